@@ -1,8 +1,11 @@
-import random as rand
-from typing import Any, Callable, Dict, List, Protocol
+from typing import Callable, List, Optional, Protocol, Sequence
+
+import numpy as np
 
 from .color import Color
-from .strand import Strand
+from .convert import hsv_to_rgb
+from .kernels import Glide, HueAdd, Op, PerPixel, Program, Shift
+from .strand import PixelView, Strand, pack_colors, segmented
 
 class AniInitFunc(Protocol):
     def __call__(self, i: int, strip: List[Color]) -> Color: ...
@@ -54,75 +57,111 @@ class Animations:
         def rainbow(pixel: Color):
             h, s, v = pixel.h + 1 if pixel.h < 255 else 0, pixel.s, pixel.v
             return Color(_hsv=(h, s, v))
+    rainbow_cycle = Program(Initialization.rainbow, [HueAdd(1)])
+
     @staticmethod
-    def rainbow_cycle(i: int, strip: List[Color], init: bool = False) -> Color:
-        if init is True:
-            return Animations.Initialization.rainbow(i, strip)
-        h, s, v = strip[i].hsv
-        hp = h + 1 if h < 255 else 0
-        color = Color(_hsv=(hp, s, v))
-        return color
+    def _ops(transformation: AniTransFunc) -> List[Op]:
+        """The operations equivalent to a per-pixel transformation; PerPixel when there are none."""
+        if transformation is Animations.Transformation.identity:
+            return []
+        if transformation is Animations.Transformation.rainbow:
+            return [HueAdd(1)]
+        return [PerPixel(transformation)]
 
     @staticmethod
-    def chase(init_func: AniInitFunc, transformation: AniTransFunc = Transformation.identity, step_length: int = 1, smooth: bool = False):
-        def initialized_chase(i, strip, init=False):
-            if init is True:
-                return init_func(i, strip)
-            if i + step_length >= len(strip):
-                j = i + step_length - len(strip)
-            else:
-                j = i + step_length
-            return transformation(strip[j])
-        return initialized_chase
+    def chase(init_func: AniInitFunc, transformation: AniTransFunc = Transformation.identity, step_length: float = 1, smooth: bool = False,
+              speed: Optional[float] = None):
+        """Move the initial pattern along the strand, by step_length pixels per frame or, if given, speed pixels per second.
+
+        Fractional steps and speeds are rendered anti-aliased between neighbouring pixels with smooth, and rounded to
+        whole pixels otherwise; see kernels.Glide.
+        """
+        if speed is not None:
+            move = Glide(per_second=speed)
+        elif step_length != int(step_length):
+            move = Glide(per_frame=step_length)
+        else:
+            move = Shift(int(step_length))
+        return Program(init_func, [move] + Animations._ops(transformation), smooth=smooth)
 
     @staticmethod
-    def pixel_chase(color: Color = Color.white, transformation: AniTransFunc = Transformation.identity, step_length: int = 1, smooth: bool = False):
-        def initialized_pixelChase(i, strip, init=False):
-            if init is True:
-                return Animations.Initialization.first_pixel_to_color(color)(i, strip)
-            if i + step_length >= len(strip):
-                j = i + step_length - len(strip)
-            else:
-                j = i + step_length
-            return transformation(strip[j])
-        return initialized_pixelChase
+    def pixel_chase(color: Color = Color.white, transformation: AniTransFunc = Transformation.identity, step_length: float = 1, smooth: bool = False,
+                    speed: Optional[float] = None):
+        return Animations.chase(Animations.Initialization.first_pixel_to_color(color), transformation, step_length, smooth, speed)
 
     @staticmethod
-    def rainbow_chase(step_length: int = 1, smooth: bool = False):
-        def initialized_pixelChase(i, strip, init=False):
-            if init is True:
-                return Animations.Initialization.first_pixel_to_color(Color(_hsv=(0, 255, 255)))(i, strip)
-            if i + step_length >= len(strip):
-                j = i + step_length - len(strip)
-            else:
-                j = i + step_length
-            return Animations.Transformation.rainbow(strip[j])
-        return initialized_pixelChase
+    def rainbow_chase(step_length: float = 1, smooth: bool = False, speed: Optional[float] = None):
+        return Animations.chase(Animations.Initialization.first_pixel_to_color(Color(_hsv=(0, 255, 255))),
+                                Animations.Transformation.rainbow, step_length, smooth, speed)
+
+    class SparkleState:
+        """Struct-of-arrays state of the sparkle family, one entry per pixel.
+
+        age counts the frames a pixel has been fading for, color is the color
+        it lit up with and active marks the pixels that are lit. rng is the
+        generator all random draws come from; seed it to make a show repeat.
+        """
+        def __init__(self, strand_length: int, seed=None):
+            self.age = np.zeros(strand_length, dtype=np.int64)
+            self.color = np.zeros((strand_length, 3), dtype=np.uint8)
+            self.active = np.zeros(strand_length, dtype=bool)
+            self.rng = np.random.default_rng(seed)
 
     @staticmethod
     def multi_sparkle(strand_length: int, probability: float = .1, decay_rate: float = .95,
-                pop: Callable[[int, List[Color], List[Dict[str, Any]]], Color] = lambda i, strip, state: Color.white):
-        state = [dict(t=0) for i in range(strand_length)]
-        decay_func = Animations.Transformation.exponential_decay(decay_rate)
-        def func(i: int, strip: List[Color], init: bool = False) -> Color:
+                pop: Callable[[int, Sequence[Color], np.ndarray], Color] = lambda i, strip, t: Color.white,
+                colors: Callable[[np.random.Generator, int], np.ndarray] = None, seed=None):
+        """Dark pixels light up with `probability` per frame and then fade out.
+
+        A lit pixel is scaled by decay_rate ** t every frame, t being the
+        number of frames it has been fading for. `colors(rng, k)` picks the
+        colors of the k pixels lit in a frame, as a (k, 3) uint8 array; without
+        it `pop(i, strip, t)` is called for each of them. The state is kept in
+        a SparkleState, available as the returned function's `state`.
+        """
+        state = Animations.SparkleState(strand_length, seed)
+
+        @segmented
+        def func(frame: np.ndarray, init: bool = False, region: slice = slice(None)) -> np.ndarray:
             if init is True:
-                return Animations.Initialization.fill()(i, strip)
-            if strip[i] == Color.black:
-                if rand.random() < probability:
-                    state[i]['t'] = 0
-                    return pop(i, strip, state)
-            else:
-                state[i]['t'] += 1
-                return decay_func(strip[i], state[i]['t'])
-            return strip[i]
+                state.active[region] = False
+                return np.zeros_like(frame[region])
+            start, stop, _ = region.indices(len(frame))
+            segment, age = frame[region], state.age[region]
+            lit = segment.any(axis=1)
+            age[lit] += 1
+            out = segment.copy()
+            out[lit] = segment[lit] * np.power(decay_rate, age[lit])[:, None]
+            # Spawns are drawn for the whole strand, even when rendering a
+            # region, so that the show does not depend on how the strand is
+            # split between processes.
+            spawn = np.flatnonzero(~frame.any(axis=1) & (state.rng.random(len(frame)) < probability))
+            if spawn.size > 0:
+                spawn_colors = colors(state.rng, spawn.size) if colors is not None else None
+                inside = (spawn >= start) & (spawn < stop)
+                spawn = spawn[inside]
+                age[spawn - start] = 0
+                if spawn_colors is not None:
+                    out[spawn - start] = spawn_colors[inside]
+                else:
+                    pixels = PixelView(frame)
+                    out[spawn - start] = pack_colors([pop(i, pixels, state.age) for i in spawn.tolist()])
+                state.color[spawn] = out[spawn - start]
+            state.active[region] = out.any(axis=1)
+            return out
+        func.state = state
         return func
 
     @staticmethod
-    def sparkle(strand_length: int, probability: float = .1, decay_rate: float = .95):
-        return Animations.multi_sparkle(strand_length, probability, decay_rate)
+    def sparkle(strand_length: int, probability: float = .1, decay_rate: float = .95, seed=None):
+        def colors(rng: np.random.Generator, count: int) -> np.ndarray:
+            return np.full((count, 3), 255, dtype=np.uint8)
+        return Animations.multi_sparkle(strand_length, probability, decay_rate, colors=colors, seed=seed)
 
     @staticmethod
-    def rainbow_sparkle(strand_length: int, probability: float = .1, decay_rate: float = .95):
-        def pop(i: int, strip: List[Color], state: List[Dict[str, Any]]) -> Color:
-            return Color(_hsv=(rand.randint(0, 255), 255, 255))
-        return Animations.multi_sparkle(strand_length, probability, decay_rate, pop=pop)
+    def rainbow_sparkle(strand_length: int, probability: float = .1, decay_rate: float = .95, seed=None):
+        def colors(rng: np.random.Generator, count: int) -> np.ndarray:
+            hsv = np.full((count, 3), 255, dtype=np.uint8)
+            hsv[:, 0] = rng.integers(0, 256, count)
+            return hsv_to_rgb(hsv)
+        return Animations.multi_sparkle(strand_length, probability, decay_rate, colors=colors, seed=seed)
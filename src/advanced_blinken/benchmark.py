@@ -0,0 +1,141 @@
+"""Animation throughput benchmarks.
+
+Runs every Animations factory through Strand on the headless mock backend at
+several strand sizes, and reports frames per second, per-frame latency
+percentiles and the memory allocated per frame.
+
+    python -m advanced_blinken.benchmark --output bench.json
+    python -m advanced_blinken.benchmark --compare bench.json
+
+Results are written as JSON so that runs from different versions can be
+compared with --compare. Animations are computed every frame unless --cache
+is given, in which case periodic ones replay from a FrameCache once they have
+gone round once; whether it was is recorded with the results.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from . import __version__
+from .animations import Animations
+from .cache import FrameCache
+from .color import Color
+from .mock_pixel_strip import NullRenderer, PixelStrip
+from .strand import Strand
+
+SIZES = (150, 450, 5000, 50000)
+
+ANIMATIONS: Dict[str, Callable[[int], object]] = {
+    'rainbow_cycle': lambda n: Animations.rainbow_cycle,
+    'chase': lambda n: Animations.chase(Animations.Initialization.first_pixel_to_color(Color.white)),
+    'pixel_chase': lambda n: Animations.pixel_chase(Color.cyan),
+    'rainbow_chase': lambda n: Animations.rainbow_chase(),
+    'sparkle': lambda n: Animations.sparkle(n, probability=.01, decay_rate=.8),
+    'rainbow_sparkle': lambda n: Animations.rainbow_sparkle(n, probability=.01, decay_rate=.8),
+}
+
+
+def run_case(name: str, led_count: int, frames: int = 200, seconds: float = 2.0, warmup: int = 5,
+             cache: bool = False) -> dict:
+    """Benchmark one animation at one strand size, with a cache of its own if `cache`."""
+    strand = Strand(led_count, delay_ms=0, strip=PixelStrip(led_count, 18, renderer=NullRenderer()),
+                    cache=FrameCache() if cache else None)
+    strand.transition_function = ANIMATIONS[name](led_count)
+    for _ in range(warmup):
+        strand.show()
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while len(latencies) < frames and (len(latencies) == 0 or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        strand.show()
+        latencies.append(time.perf_counter_ns() - start)
+
+    # Allocation is measured on a separate, shorter pass: tracing slows
+    # everything down and would distort the timings above.
+    allocated = []
+    tracemalloc.start()
+    for _ in range(min(len(latencies), 20)):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        strand.show()
+        allocated.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    ms = np.array(latencies) / 1e6
+    return dict(
+        animation=name,
+        leds=led_count,
+        cache=cache,
+        frames=len(latencies),
+        fps=len(latencies) / (ms.sum() / 1000),
+        p50_ms=float(np.percentile(ms, 50)),
+        p90_ms=float(np.percentile(ms, 90)),
+        p99_ms=float(np.percentile(ms, 99)),
+        max_ms=float(ms.max()),
+        alloc_bytes_per_frame=float(np.mean(allocated)),
+    )
+
+
+def run(animations: List[str], sizes: List[int], frames: int = 200, seconds: float = 2.0,
+        cache: bool = False) -> dict:
+    return dict(
+        version=__version__,
+        python=platform.python_version(),
+        numpy=np.__version__,
+        machine=platform.machine(),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        cache=cache,
+        results=[run_case(name, size, frames, seconds, cache=cache) for name in animations for size in sizes],
+    )
+
+
+def format_table(report: dict, baseline: Optional[dict] = None) -> str:
+    # Results from before the cache option computed every frame.
+    previous = {(r['animation'], r['leds'], r.get('cache', False)): r for r in baseline['results']} if baseline else {}
+    header = f"{'animation':<16}{'leds':>7}{'fps':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'alloc kB':>10}"
+    if previous:
+        header += f"{'vs base':>9}"
+    lines = [header]
+    for r in report['results']:
+        line = (f"{r['animation']:<16}{r['leds']:>7}{r['fps']:>10.1f}{r['p50_ms']:>9.2f}{r['p90_ms']:>9.2f}"
+                f"{r['p99_ms']:>9.2f}{r['alloc_bytes_per_frame'] / 1024:>10.1f}")
+        base = previous.get((r['animation'], r['leds'], r['cache']))
+        if base is not None:
+            line += f"{r['fps'] / base['fps']:>8.2f}x"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-a', '--animation', action='append', choices=sorted(ANIMATIONS),
+                        help='animation to run (repeatable, default: all)')
+    parser.add_argument('-n', '--leds', action='append', type=int, help=f'strand size (repeatable, default: {SIZES})')
+    parser.add_argument('--frames', type=int, default=200, help='frames to time per case')
+    parser.add_argument('--seconds', type=float, default=2.0, help='time budget per case')
+    parser.add_argument('--cache', action='store_true', help='replay periodic animations from a frame cache')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    report = run(args.animation or list(ANIMATIONS), args.leds or list(SIZES), args.frames, args.seconds, args.cache)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_table(report, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+
+def periodic(period: Union[int, Callable[[int], Optional[int]]]):
+    """Declare that a frame function repeats itself every `period` steps.
+
+    period is either a number of steps or a function of the strand length
+    returning one (or None when it cannot tell). Strand checks the declaration
+    against the frames it actually renders before relying on it.
+    """
+    def decorator(func):
+        func.period = period if callable(period) else (lambda n: period)
+        return func
+    return decorator
+
+
+def pure(func):
+    """Declare that a frame function's output depends only on its input frame.
+
+    Such a function is periodic as soon as a frame comes back around, so
+    Strand can find the period itself by watching for the first frame to recur.
+    """
+    func.pure = True
+    return func
+
+
+def period_of(func, led_count: int) -> Optional[int]:
+    period = getattr(func, 'period', None)
+    return period(led_count) if period is not None else None
+
+
+class FrameCache:
+    """Memory-capped store of rendered animation periods, shared by all strands.
+
+    Entries are evicted least recently used first once the total size would
+    go over max_bytes.
+    """
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key) -> Optional[np.ndarray]:
+        with self._lock:
+            frames = self._entries.get(key)
+            if frames is not None:
+                self._entries.move_to_end(key)
+            return frames
+
+    def fits(self, nbytes: int) -> bool:
+        return nbytes <= self.max_bytes
+
+    def put(self, key, frames: np.ndarray):
+        if not self.fits(frames.nbytes):
+            return
+        frames.setflags(write=False)
+        with self._lock:
+            self._evict(key)
+            while self._entries and self.nbytes + frames.nbytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+            self._entries[key] = frames
+            self.nbytes += frames.nbytes
+
+    def evict(self, key):
+        with self._lock:
+            self._evict(key)
+
+    def _evict(self, key):
+        frames = self._entries.pop(key, None)
+        if frames is not None:
+            self.nbytes -= frames.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+frame_cache = FrameCache()
+
+
+class CachedAnimation:
+    """Frame function wrapper that renders one period and then replays it.
+
+    The first period is rendered normally and copied into a preallocated
+    array (or, when the period has to be detected, collected until the first
+    frame recurs). Once the frame after it has matched the first one, steps
+    are served from the cache. Each step checks that the incoming frame is the
+    one the cache expects, so a frame changed from outside, e.g. by
+    Strand.fill(), falls back to computing.
+    """
+    is_frame_transition = True
+
+    def __init__(self, func, led_count: int, cache: FrameCache = frame_cache):
+        self.__wrapped__ = func
+        self._cache = cache
+        self._key = (func, led_count)
+        self._period = period_of(func, led_count)
+        self._detect = self._period is None and getattr(func, 'pure', False)
+        self._recording = None
+        self._recorded = 0
+        self._position: Optional[int] = None
+
+    @staticmethod
+    def cacheable(func, led_count: int) -> bool:
+        return period_of(func, led_count) is not None or getattr(func, 'pure', False)
+
+    @property
+    def cached(self) -> bool:
+        return self._cache.get(self._key) is not None
+
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray:
+        frames = self._cache.get(self._key)
+        if init is True:
+            out = self.__wrapped__(frame, init=True)
+            self._position = 0 if frames is not None and (frames[0] == out).all() else None
+            self._recording = None
+            return out
+
+        if frames is not None and self._position is not None and (frames[self._position] == frame).all():
+            self._position = (self._position + 1) % len(frames)
+            return frames[self._position].copy()
+        self._position = None
+
+        out = self.__wrapped__(frame, init=False)
+        if frames is None:
+            self._record(frame, out)
+        return out
+
+    def _record(self, frame: np.ndarray, out: np.ndarray):
+        if self._recording is None:
+            if self._period is not None:
+                if self._period < 1 or not self._cache.fits(self._period * frame.nbytes):
+                    return
+                self._recording = np.empty((self._period, ) + frame.shape, dtype=frame.dtype)
+            elif self._detect:
+                self._recording = []
+            else:
+                return
+            self._recorded = 0
+            self._keep(frame)
+
+        if (out == self._recording[0]).all():
+            if self._period is None or self._recorded == self._period:
+                frames = self._recording if self._period is not None else np.stack(self._recording)
+                self._cache.put(self._key, frames)
+                self._position = 0
+                self._recording = None
+            else:
+                self._give_up()
+        elif self._recorded == (self._period or self._cache.max_bytes // frame.nbytes):
+            self._give_up()
+        else:
+            self._keep(out)
+
+    def _keep(self, frame: np.ndarray):
+        if isinstance(self._recording, list):
+            self._recording.append(frame.copy())
+        else:
+            self._recording[self._recorded] = frame
+        self._recorded += 1
+
+    def _give_up(self):
+        # The animation is not periodic the way it claimed (or not within
+        # the memory cap); stop paying for the copies.
+        self._period, self._detect, self._recording = None, False, None
@@ -1,15 +1,9 @@
-from dataclasses import dataclass
 from enum import Enum
-import colorsys
 from typing import Callable, Tuple, Union
 
-from rich.console import Console
-from rich.color import Color as RichColor
-from rich.segment import Segment
-from rich.style import Style
-from rich.color import Color as RichColor
-
-from .named_colors import named_colors
+from .color_value import ColorValue
+from .convert import hsv_to_rgb_pixel
+from .palette import palette
 
 class ColorSpace(Enum):
     RGB = 1
@@ -17,8 +11,10 @@ class ColorSpace(Enum):
 
 class MetaColor(type):
     def __getattr__(cls, item):
-        if item in named_colors:
-            return Color(_rgb=named_colors[item])
+        if item in palette:
+            return palette[item]
+        elif item == 'families':
+            return palette.families
         else:
             raise AttributeError(f"'{cls.__class__.__name__}' object has no attribute '{item}'")
 
@@ -32,201 +28,109 @@ class MetaColor(type):
         return i if i <= 255 else i - 255
 
 
-@dataclass
-class Color(metaclass=MetaColor):
-    _red: int = None
-    _green: int = None
-    _blue: int = None
-    _hue: int = None
-    _saturation: int = None
-    _value: int = None
-    _r: int = None
-    _g: int = None
-    _b: int = None
-    _h: int = None
-    _s: int = None
-    _v: int = None
-    _rgb: Tuple[int, int, int] = None
-    _hsv: Tuple[int, int, int] = None
-
-    def __post_init__(self):
-        self._console = Console()
-        if self._red is not None and self._green is not None and self._blue is not None:
-            self.rgb = (self._red, self._green, self._blue, )
-        elif self._r is not None and self._g is not None and self._b is not None:
-            self.rgb = (self._r, self._g, self._b, )
-        elif self._hue is not None and self._saturation is not None and self._value is not None:
-            self.hsv = (self._hue, self._saturation, self._value, )
-        elif self._h is not None and self._s is not None and self._v is not None:
-            self.hsv = (self._h, self._s, self._v, )
-        elif self._rgb is not None:
-            self.rgb = self._rgb
-        elif self._hsv is not None:
-            self.hsv = self._hsv
+class Color(ColorValue, metaclass=MetaColor):
+    """A mutable color on top of ColorValue's packed storage.
+
+    Accepts any one of the component spellings below; setting any component
+    updates the packed value and the other color space with it.
+    """
+    __slots__ = ()
+    __setattr__ = object.__setattr__
+    __delattr__ = object.__delattr__
+    __hash__ = None
+
+    def __init__(self, _red: int = None, _green: int = None, _blue: int = None,
+                 _hue: int = None, _saturation: int = None, _value: int = None,
+                 _r: int = None, _g: int = None, _b: int = None,
+                 _h: int = None, _s: int = None, _v: int = None,
+                 _rgb: Tuple[int, int, int] = None, _hsv: Tuple[int, int, int] = None):
+        if isinstance(_red, ColorValue):
+            ColorValue.__init__(self, _red._packed, _red._hsv_cache)
+        elif _red is not None and _green is not None and _blue is not None:
+            self.rgb = (_red, _green, _blue, )
+        elif _r is not None and _g is not None and _b is not None:
+            self.rgb = (_r, _g, _b, )
+        elif _hue is not None and _saturation is not None and _value is not None:
+            self.hsv = (_hue, _saturation, _value, )
+        elif _h is not None and _s is not None and _v is not None:
+            self.hsv = (_h, _s, _v, )
+        elif _rgb is not None:
+            self.rgb = _rgb
+        elif _hsv is not None:
+            self.hsv = _hsv
         else:
             raise ValueError('no color provided')
 
     def __getattr__(self, item):
-        if item in named_colors:
-            self.rgb = named_colors[item].rgb
+        if item in palette:
+            self.rgb = palette[item].rgb
             return self
         else:
             raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{item}'")
 
-    def __int__(self):
-        return (self._r << 16) + (self._g << 8) + self._blue
-
     def __copy__(self):
-        return Color(_rgb=self.rgb)
+        return Color(self)
 
     def __deepcopy__(self, memodict={}):
-        return Color(_rgb=self.rgb)
-
-    @property
-    def rgb(self):
-        return self._rgb
-
-    @property
-    def red(self) -> int:
-        return self._red
-
-    @property
-    def green(self) -> int:
-        return self._green
-
-    @property
-    def blue(self) -> int:
-        return self._blue
-
-    @property
-    def r(self) -> int:
-        return self._r
-
-    @property
-    def g(self) -> int:
-        return self._g
-
-    @property
-    def b(self) -> int:
-        return self._b
-
-    @property
-    def hsv(self):
-        return self._hsv
-
-    @property
-    def hue(self) -> int:
-        return self._hue
+        return Color(self)
 
-    @property
-    def saturation(self) -> int:
-        return self._saturation
-
-    @property
-    def value(self) -> int:
-        return self._value
-
-    @property
-    def h(self) -> int:
-        return self._h
-
-    @property
-    def s(self) -> int:
-        return self._s
-
-    @property
-    def v(self) -> int:
-        return self._v
+    def __reduce__(self):
+        return Color, (ColorValue(self._packed, self._hsv_cache), )
 
     def _from_int(self, value):
-        self._blue = value & 255
-        self._green = (value >> 8) & 255
-        self._red = (value >> 16) & 255
+        self._packed = value & 0xFFFFFF
+        self._hsv_cache = None
 
-    @rgb.setter
+    @ColorValue.rgb.setter
     def rgb(self, rgb: Union[Tuple[int, int, int], int]):
         if isinstance(rgb, int):
             self._from_int(rgb)
         else:
-            self._red = self._r = Color._overflow_behavior(rgb[0])
-            self._green = self._g = Color._overflow_behavior(rgb[1])
-            self._blue = self._b = Color._overflow_behavior(rgb[2])
-            self._rgb = (Color._overflow_behavior(rgb[0]), Color._overflow_behavior(rgb[1]), Color._overflow_behavior(rgb[2]) )
-            h, s, v = colorsys.rgb_to_hsv(rgb[0] / 255.0, rgb[1] / 255.0, rgb[2] / 255.0, )
-            h, s, v = (int(h * 255), int(s * 255), int(v * 255), )
-            self._hue = self._h = Color._overflow_behavior(h)
-            self._saturation = self._s = Color._overflow_behavior(s)
-            self._value = self._v = Color._overflow_behavior(v)
-            self._hsv = (Color._overflow_behavior(h), Color._overflow_behavior(s), Color._overflow_behavior(v))
-
-    @red.setter
+            r, g, b = (Color._overflow_behavior(c) for c in rgb)
+            self._packed = (r << 16) | (g << 8) | b
+            self._hsv_cache = None
+
+    @ColorValue.red.setter
     def red(self, r: int) -> None:
-        self.rgb = (r, self._g, self._b)
+        self.rgb = (r, self.g, self.b)
 
-    @green.setter
+    @ColorValue.green.setter
     def green(self, g: int) -> None:
-        self.rgb = (self._r, g, self._b)
+        self.rgb = (self.r, g, self.b)
 
-    @blue.setter
+    @ColorValue.blue.setter
     def blue(self, b: int) -> None:
-        self.rgb = (self._r, self._g, b)
-
-    @r.setter
-    def r(self, r: int) -> None:
-        self.rgb = (r, self._g, self._b)
+        self.rgb = (self.r, self.g, b)
 
-    @g.setter
-    def g(self, g: int) -> None:
-        self.rgb = (self._r, g, self._b)
+    r = red
+    g = green
+    b = blue
 
-    @b.setter
-    def b(self, b: int) -> None:
-        self._rgb = (self._r, self._g, b)
-
-    @hsv.setter
+    @ColorValue.hsv.setter
     def hsv(self, hsv: Union[Tuple[int, int, int], int]) -> None:
         if isinstance(hsv, int):
             self._from_int(hsv)
         else:
-            self._hue = self._h = Color._overflow_behavior(hsv[0])
-            self._saturation = self._s = Color._overflow_behavior(hsv[1])
-            self._value = self._v = Color._overflow_behavior(hsv[2])
-            self._hsv = (Color._overflow_behavior(hsv[0]), Color._overflow_behavior(hsv[1]), Color._overflow_behavior(hsv[2]) )
-            r, g, b = colorsys.hsv_to_rgb(hsv[0] / 255.0, hsv[1] / 255.0, hsv[2] / 255.0, )
-            r, g, b = (int(r * 255), int(g * 255), int(b * 255), )
-            self._red = self._r = Color._overflow_behavior(r)
-            self._green = self._g = Color._overflow_behavior(g)
-            self._blue = self._b = Color._overflow_behavior(b)
-            self._rgb = (Color._overflow_behavior(r), Color._overflow_behavior(g), Color._overflow_behavior(b))
-
-    @hue.setter
+            h, s, v = (Color._overflow_behavior(c) for c in hsv)
+            r, g, b = hsv_to_rgb_pixel(h, s, v)
+            self._packed = (r << 16) | (g << 8) | b
+            self._hsv_cache = (h, s, v)
+
+    @ColorValue.hue.setter
     def hue(self, h: int) -> None:
-        self.hsv = (h, self._s, self._v)
+        self.hsv = (h, self.s, self.v)
 
-    @saturation.setter
+    @ColorValue.saturation.setter
     def saturation(self, s: int) -> None:
-        self.hsv = (self._h, s, self._v)
+        self.hsv = (self.h, s, self.v)
 
-    @value.setter
+    @ColorValue.value.setter
     def value(self, v: int) -> None:
-        self.hsv = (self._h, self._s, v)
-
-    @h.setter
-    def h(self, h: int) -> None:
-        self.hsv = (h, self._s, self._v)
+        self.hsv = (self.h, self.s, v)
 
-    @s.setter
-    def s(self, s: int) -> None:
-        self.hsv = (self._h, s, self._v)
-
-    @v.setter
-    def v(self, v: int) -> None:
-        self.hsv = (self._h, self._s, v)
+    h = hue
+    s = saturation
+    v = value
 
     def overflow(self, func: Callable[[int], int]) -> None:
         Color._overflow_behavior = func
-
-    def show(self):
-        bgcolor = RichColor.from_rgb(self._r, self._g, self._b)
-        color = RichColor.from_rgb(self._r, self._g, self._b)
-        return Segment("▄", Style(color=color, bgcolor=bgcolor))
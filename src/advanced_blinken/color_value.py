@@ -0,0 +1,107 @@
+from typing import Optional, Tuple
+
+from rich.color import Color as RichColor
+from rich.segment import Segment
+from rich.style import Style
+
+from .convert import hsv_to_rgb_pixel, rgb_to_hsv_pixel
+
+
+class ColorValue:
+    """An immutable 24-bit RGB color.
+
+    The color is stored as a single packed int (0xRRGGBB). HSV is only computed
+    the first time it is asked for and is then cached on the instance.
+    """
+    __slots__ = ('_packed', '_hsv_cache')
+
+    def __init__(self, packed: int, hsv: Optional[Tuple[int, int, int]] = None):
+        object.__setattr__(self, '_packed', packed)
+        object.__setattr__(self, '_hsv_cache', hsv)
+
+    @classmethod
+    def from_rgb(cls, r: int, g: int, b: int) -> 'ColorValue':
+        return cls((r << 16) | (g << 8) | b)
+
+    @classmethod
+    def from_hsv(cls, h: int, s: int, v: int) -> 'ColorValue':
+        r, g, b = hsv_to_rgb_pixel(h, s, v)
+        return cls((r << 16) | (g << 8) | b, (h, s, v))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
+
+    def __eq__(self, other):
+        if isinstance(other, ColorValue):
+            return self._packed == other._packed
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._packed)
+
+    def __int__(self):
+        return self._packed
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(_rgb={self.rgb})'
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memodict={}):
+        return self
+
+    def __reduce__(self):
+        return ColorValue, (self._packed, self._hsv_cache)
+
+    @property
+    def rgb(self) -> Tuple[int, int, int]:
+        packed = self._packed
+        return (packed >> 16) & 255, (packed >> 8) & 255, packed & 255
+
+    @property
+    def red(self) -> int:
+        return (self._packed >> 16) & 255
+
+    @property
+    def green(self) -> int:
+        return (self._packed >> 8) & 255
+
+    @property
+    def blue(self) -> int:
+        return self._packed & 255
+
+    r = red
+    g = green
+    b = blue
+
+    @property
+    def hsv(self) -> Tuple[int, int, int]:
+        hsv = self._hsv_cache
+        if hsv is None:
+            hsv = rgb_to_hsv_pixel(*self.rgb)
+            object.__setattr__(self, '_hsv_cache', hsv)
+        return hsv
+
+    @property
+    def hue(self) -> int:
+        return self.hsv[0]
+
+    @property
+    def saturation(self) -> int:
+        return self.hsv[1]
+
+    @property
+    def value(self) -> int:
+        return self.hsv[2]
+
+    h = hue
+    s = saturation
+    v = value
+
+    def show(self):
+        color = RichColor.from_rgb(*self.rgb)
+        return Segment("▄", Style(color=color, bgcolor=color))
@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from typing import Dict, Iterable, Mapping, Optional, Union
+
+import numpy as np
+
+from .scheduler import FrameScheduler
+from .stats import FrameStats
+from .strand import Strand, install_signal_handlers
+
+
+class Controller:
+    """Drives several strands in lockstep off one frame clock.
+
+    Every frame, all strands compute their next frame (in parallel threads if
+    `parallel`; numpy releases the GIL for the heavy lifting), then all write
+    their backend buffers, and only then are they shown one right after the
+    other, so that segments on different channels never show frames from
+    different ticks.
+
+    Create the strands with handle_signals=False: the controller installs the
+    signal handlers and stops all of its strands together. Each strand keeps
+    its own timings in strand.stats, labelled with its name; the controller's
+    stats cover the whole rig, with 'show' measuring the back-to-back push.
+    """
+    def __init__(self, strands: Union[Iterable[Strand], Mapping[str, Strand]], delay_ms: float = 50,
+                 parallel: bool = True, handle_signals: bool = True):
+        if not isinstance(strands, Mapping):
+            strands = {f'strand{i}': strand for i, strand in enumerate(strands)}
+        if len(strands) == 0:
+            raise ValueError('Controller needs at least one strand')
+        self.strands: Dict[str, Strand] = dict(strands)
+        for name, strand in self.strands.items():
+            strand.stats.labels.setdefault('strand', name)
+        self.parallel = parallel
+        self._exitEvent = Event()
+        if handle_signals:
+            install_signal_handlers(self._exitEvent)
+        self._delay = delay_ms / 1000.0
+        self._scheduler = FrameScheduler(self._delay)
+        self._stats = FrameStats(labels={'strand': 'all'})
+        self._stats.gauges = lambda: {f'scheduler_{k}': v for k, v in self._scheduler.stats().items()}
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def __getitem__(self, name: str) -> Strand:
+        return self.strands[name]
+
+    def __len__(self):
+        return len(self.strands)
+
+    @property
+    def scheduler(self) -> FrameScheduler:
+        return self._scheduler
+
+    @property
+    def stats(self) -> FrameStats:
+        return self._stats
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """FrameStats.report() of the controller (as 'all') and of every strand, by name."""
+        return dict(all=self._stats.report(), **{name: strand.stats.report() for name, strand in self.strands.items()})
+
+    def stop(self):
+        self._exitEvent.set()
+
+    def show(self, step: bool = True):
+        self._show(step)
+        self._end_frame()
+
+    def _show(self, step: bool = True):
+        strands = list(self.strands.values())
+        start_time = time.perf_counter()
+        if step is False:
+            frames = [None] * len(strands)
+        elif self._pool is not None:
+            frames = list(self._pool.map(lambda strand: strand._render(), strands))
+        else:
+            frames = [strand._render() for strand in strands]
+        self._stats.record('transition', time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for strand, frame in zip(strands, frames):
+            strand._update(frame)
+        self._stats.record('write', time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for strand in strands:
+            strand._push()
+        self._stats.record('show', time.perf_counter() - start_time)
+
+        for strand in strands:
+            if strand._recorder is not None:
+                strand._recorder.write(strand.frame)
+
+    def _end_frame(self):
+        for strand in self.strands.values():
+            strand.stats.end_frame()
+        self._stats.end_frame()
+
+    def loop(self, iterations=None, skip_frames: bool = False):
+        """Show a frame on every strand every delay_ms; see Strand.loop()."""
+        if self.parallel and len(self.strands) > 1:
+            self._pool = ThreadPoolExecutor(len(self.strands), thread_name_prefix='Controller')
+        self._scheduler.skip_frames = skip_frames
+        self._scheduler.start()
+        try:
+            while not self._exitEvent.is_set() and (iterations is None or iterations > 0):
+                if iterations is not None:
+                    iterations -= 1
+                self._show()
+                start_time = time.perf_counter()
+                if not self._scheduler.wait(self._exitEvent):
+                    break
+                self._stats.record('sleep', time.perf_counter() - start_time)
+                self._end_frame()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        self.clear()
+
+    def clear(self):
+        for strand in self.strands.values():
+            strand._update(np.zeros_like(strand.frame))
+        for strand in self.strands.values():
+            strand._push()
@@ -0,0 +1,89 @@
+from typing import Tuple
+
+import numpy as np
+
+# HSV <-> RGB conversion on 8-bit channels. Every component uses the 0-255 scale
+# Color uses, hue included: a hue of 255 is one full turn around the wheel, so
+# colorsys.hsv_to_rgb(h / 255, s / 255, v / 255) is the reference. The maths is
+# done in integers and rounded to nearest, which keeps hsv -> rgb -> hsv stable;
+# truncating (as int(x * 255) does) loses up to one hue step per round trip.
+#
+# The array functions take and return (..., 3) arrays and convert a whole frame
+# in one call. The *_pixel functions are the same formulas on plain ints, for
+# code that only has a single color in hand.
+
+_FULL = 255 * 255
+
+
+def hsv_to_rgb(hsv: np.ndarray) -> np.ndarray:
+    """Convert an (..., 3) array of 8-bit HSV values to 8-bit RGB."""
+    hsv = np.asarray(hsv).astype(np.int32)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    sector, f = np.divmod(h * 6, 255)
+    p = (v * (255 - s) + 127) // 255
+    q = (v * (_FULL - s * f) + _FULL // 2) // _FULL
+    t = (v * (_FULL - s * (255 - f)) + _FULL // 2) // _FULL
+    sector %= 6
+    r = np.choose(sector, (v, q, p, p, t, v))
+    g = np.choose(sector, (t, v, v, q, p, p))
+    b = np.choose(sector, (p, p, t, v, v, q))
+    return np.stack((r, g, b), axis=-1).astype(np.uint8)
+
+
+def rgb_to_hsv(rgb: np.ndarray) -> np.ndarray:
+    """Convert an (..., 3) array of 8-bit RGB values to 8-bit HSV."""
+    rgb = np.asarray(rgb).astype(np.int32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    v = rgb.max(axis=-1)
+    rangec = v - rgb.min(axis=-1)
+    grey = rangec == 0
+    safe_range = np.where(grey, 1, rangec)
+    s = np.where(grey, 0, (rangec * 255 + v // 2) // np.where(v == 0, 1, v))
+    # Position around the wheel in units of 1 / (6 * rangec) turns.
+    turn = np.select([r == v, g == v], [g - b, 2 * rangec + b - r], 4 * rangec + r - g)
+    turn %= 6 * safe_range
+    h = np.where(grey, 0, (turn * 255 + 3 * safe_range) // (6 * safe_range))
+    return np.stack((h, s, v), axis=-1).astype(np.uint8)
+
+
+def rotate_hue(rgb: np.ndarray, steps: int = 1) -> np.ndarray:
+    """Move every pixel of an RGB frame `steps` hue units around the wheel."""
+    hsv = rgb_to_hsv(rgb)
+    hsv[..., 0] += np.uint8(steps % 256)
+    return hsv_to_rgb(hsv)
+
+
+def hsv_to_rgb_pixel(h: int, s: int, v: int) -> Tuple[int, int, int]:
+    sector, f = divmod(h * 6, 255)
+    p = (v * (255 - s) + 127) // 255
+    q = (v * (_FULL - s * f) + _FULL // 2) // _FULL
+    t = (v * (_FULL - s * (255 - f)) + _FULL // 2) // _FULL
+    return ((v, t, p), (q, v, p), (p, v, t), (p, q, v), (t, p, v), (v, p, q))[sector % 6]
+
+
+def rgb_to_hsv_pixel(r: int, g: int, b: int) -> Tuple[int, int, int]:
+    v = max(r, g, b)
+    rangec = v - min(r, g, b)
+    if rangec == 0:
+        return 0, 0, v
+    s = (rangec * 255 + v // 2) // v
+    if r == v:
+        turn = g - b
+    elif g == v:
+        turn = 2 * rangec + b - r
+    else:
+        turn = 4 * rangec + r - g
+    turn %= 6 * rangec
+    return (turn * 255 + 3 * rangec) // (6 * rangec), s, v
+
+
+def pack_rgb(rgb: np.ndarray) -> np.ndarray:
+    """Pack an (..., 3) uint8 RGB array into 0xRRGGBB uint32 values."""
+    rgb = np.asarray(rgb).astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def unpack_rgb(packed: np.ndarray) -> np.ndarray:
+    """Inverse of pack_rgb."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack(((packed >> 16) & 255, (packed >> 8) & 255, packed & 255), axis=-1).astype(np.uint8)
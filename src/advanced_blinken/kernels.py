@@ -0,0 +1,249 @@
+"""Animations described as operation graphs, compiled into array kernels.
+
+A Program is an initialization function plus a list of operations applied to
+every frame in order:
+
+    Shift(n)      pixel i takes the color of pixel i + n (wrapping around)
+    Glide(...)    like Shift, by a fractional number of pixels per frame and/or per second
+    HueAdd(n)     rotate every hue by n steps of 256
+    Scale(f)      multiply every channel by f
+    Mask(m)       multiply pixel i by m[i], a per-pixel weight in [0, 1]
+    PerPixel(f)   apply f(Color) -> Color to every pixel (the slow path)
+
+Compiling a Program for a strand length fuses neighbouring operations of the
+same kind (two shifts become one gather, scales and masks become one weight
+vector) and precomputes index and weight arrays, so a frame costs a few whole
+array operations. Only PerPixel calls Python per pixel, for transformations
+that have no array form.
+"""
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .color import Color, ColorValue
+from .convert import rotate_hue
+from .strand import PixelView, pack_colors
+
+# Stepping every hue once around the color wheel, i.e. rotate_hue's period:
+# hue 255 comes out as the same RGB as hue 0.
+HUE_PERIOD = 255
+
+
+class Shift:
+    def __init__(self, steps: int):
+        self.steps = steps
+
+
+class Glide:
+    """Move the pattern by `per_frame` pixels every frame plus `per_second` pixels every second.
+
+    Positions are fractional; a smooth Program renders them by interpolating
+    between the two nearest pixels, otherwise they are rounded to whole pixels.
+    """
+    def __init__(self, per_frame: float = 0.0, per_second: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.per_frame = per_frame
+        self.per_second = per_second
+        self.clock = clock
+
+
+class HueAdd:
+    def __init__(self, steps: int):
+        self.steps = steps
+
+
+class Scale:
+    def __init__(self, factor: float):
+        self.factor = factor
+
+
+class Mask:
+    def __init__(self, weights: Union[Sequence[float], Callable[[int], np.ndarray]]):
+        """weights: one per pixel, or a function of the strand length returning them."""
+        self.weights = weights
+
+    def resolve(self, led_count: int) -> np.ndarray:
+        weights = self.weights(led_count) if callable(self.weights) else self.weights
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (led_count, ):
+            raise ValueError(f'Invalid mask: {weights.shape=}, expected ({led_count}, )')
+        return weights
+
+
+class PerPixel:
+    def __init__(self, func: Callable[[ColorValue], Color]):
+        self.func = func
+
+
+Op = Union[Shift, Glide, HueAdd, Scale, Mask, PerPixel]
+
+
+def _fuse(ops: Sequence[Op], led_count: int) -> List[Op]:
+    """Merge runs of operations of the same kind; drop the ones that do nothing."""
+    fused: List[Op] = []
+    for op in ops:
+        if isinstance(op, (Scale, Mask)):
+            weights = op.resolve(led_count) if isinstance(op, Mask) else op.factor
+            previous = fused[-1] if fused else None
+            if isinstance(previous, Mask):
+                fused[-1] = Mask(previous.weights * weights)
+            else:
+                fused.append(Mask(np.broadcast_to(weights, (led_count, )).astype(np.float64)))
+        elif fused and type(op) in (Shift, HueAdd) and type(fused[-1]) is type(op):
+            fused[-1] = type(op)(fused[-1].steps + op.steps)
+        else:
+            fused.append(op)
+    return [op for op in fused
+            if not (isinstance(op, Shift) and op.steps % led_count == 0)
+            and not (isinstance(op, HueAdd) and op.steps % 256 == 0)
+            and not (isinstance(op, Mask) and (op.weights == 1).all())]
+
+
+class Kernel:
+    """A Program compiled for one strand length; a segmented frame transition function."""
+    is_frame_transition = True
+
+    def __init__(self, program: 'Program', led_count: int):
+        self.program = program
+        self.led_count = led_count
+        self.ops = _fuse(program.ops, led_count)
+        self._indices = np.arange(led_count)
+        self._pattern: Optional[np.ndarray] = None
+        self._shown: Optional[np.ndarray] = None
+        glides = [op for op in self.ops if isinstance(op, Glide)]
+        if len(glides) > 1:
+            raise ValueError(f'A Program can only Glide once: {len(glides)=}')
+        self._glide = glides[0] if glides else None
+        self.ops = [op for op in self.ops if not isinstance(op, Glide)]
+        self._position = 0.0
+        self._time = 0.0
+        shift = sum(op.steps for op in self.ops if isinstance(op, Shift))
+        self._blur = abs(shift) if program.smooth and abs(shift) > 1 and self._glide is None else 0
+        if not self._blur and self._glide is None:
+            # Every pixel of a frame is a function of the input frame alone, so
+            # a region can be rendered on its own (see SegmentRenderer).
+            self.is_segmented = True
+            # Pure, and eventually periodic, as long as every operation is a
+            # permutation of colors.
+            if all(isinstance(op, (Shift, HueAdd)) for op in self.ops):
+                self.pure = True
+                self.period = self._period
+
+    def _period(self, led_count: int) -> Optional[int]:
+        period = 1
+        for op in self.ops:
+            if isinstance(op, Shift):
+                period = math.lcm(period, led_count // math.gcd(led_count, op.steps % led_count))
+            elif op.steps % 256 == 1:
+                period = math.lcm(period, HUE_PERIOD)
+            else:
+                return None
+        return period
+
+    def _apply(self, frame: np.ndarray, region: slice) -> np.ndarray:
+        # Shifts only move pixels, so all of them compose into one gather from
+        # the input frame, which may reach outside the region. Walking the ops
+        # backwards gives that gather, and the position each of the other,
+        # per-pixel operations is applied at.
+        positions = self._indices[region]
+        at = []
+        for op in reversed(self.ops):
+            if isinstance(op, Shift):
+                positions = (positions + op.steps) % self.led_count
+            else:
+                at.append(positions)
+        out = frame[positions]
+        for op, where in zip([op for op in self.ops if not isinstance(op, Shift)], reversed(at)):
+            if isinstance(op, HueAdd):
+                out = rotate_hue(out, op.steps % 256)
+            elif isinstance(op, Mask):
+                out = (out * op.weights[where, None]).astype(np.uint8)
+            else:
+                out = pack_colors([op.func(pixel) for pixel in PixelView(out)])
+        return out
+
+    def __call__(self, frame: np.ndarray, init: bool = False, region: slice = slice(None)) -> np.ndarray:
+        if init is True:
+            pixels = PixelView(frame)
+            out = pack_colors([self.program.init(i, pixels) for i in range(*region.indices(len(frame)))])
+            self._pattern = self._shown = None
+            return out
+        if self._glide is not None:
+            return self._glide_frame(frame)[region].copy()
+        if not self._blur:
+            return self._apply(frame, region)
+        # Smooth: the unblurred pattern moves on, and what is shown is its
+        # average over every position it passed through during the step.
+        self._follow(frame)
+        self._pattern = self._apply(self._pattern, slice(None))
+        direction = 1 if sum(op.steps for op in self.ops if isinstance(op, Shift)) > 0 else -1
+        total = np.zeros(frame.shape, dtype=np.uint32)
+        for k in range(self._blur):
+            total += np.roll(self._pattern, direction * k, axis=0)
+        self._shown = (total // self._blur).astype(np.uint8)
+        return self._shown[region].copy()
+
+    def _follow(self, frame: np.ndarray) -> bool:
+        """Start over from frame unless it is the one shown last; returns True if it did."""
+        if self._pattern is not None and self._shown is not None and np.array_equal(frame, self._shown):
+            return False
+        self._pattern = frame
+        return True
+
+    def _glide_frame(self, frame: np.ndarray) -> np.ndarray:
+        # The pattern itself never moves; each frame samples it at the current
+        # fractional offset, so interpolation errors do not accumulate.
+        glide = self._glide
+        now = glide.clock()
+        if self._follow(frame):
+            # Motion is timed from the first frame after a fresh start.
+            self._position, self._time = 0.0, now
+        self._position += glide.per_frame + glide.per_second * (now - self._time)
+        self._time = now
+        self._pattern = self._apply(self._pattern, slice(None))
+        offset = self._position % self.led_count
+        if self.program.smooth:
+            whole = math.floor(offset)
+            fraction = offset - whole
+            near = self._pattern[(self._indices + whole) % self.led_count]
+            far = self._pattern[(self._indices + whole + 1) % self.led_count]
+            self._shown = np.rint(near * (1 - fraction) + far * fraction).astype(np.uint8)
+        else:
+            self._shown = self._pattern[(self._indices + math.floor(offset + .5)) % self.led_count]
+        return self._shown
+
+
+class Program:
+    """An animation as an initialization and a list of operations; see the module docstring.
+
+    A Program is a frame transition function itself and compiles itself for
+    each strand length it is called with. smooth anti-aliases motion: a Glide
+    to a fractional position interpolates between the two nearest pixels, and
+    a Shift by more than one pixel is motion blurred, showing the pattern
+    averaged over every position it passed through, so fast chases streak
+    rather than jump.
+    """
+    is_frame_transition = True
+
+    def __init__(self, init: Callable[[int, Sequence[ColorValue]], Color], ops: Sequence[Op] = (),
+                 smooth: bool = False):
+        self.init = init
+        self.ops = list(ops)
+        self.smooth = smooth
+        self._kernels: Dict[int, Kernel] = {}
+
+    def compile(self, led_count: int) -> Kernel:
+        if self.smooth or any(isinstance(op, Glide) for op in self.ops):
+            # These kernels keep the pattern they move as state, so every user gets its own.
+            return Kernel(self, led_count)
+        return self._kernel(led_count)
+
+    def _kernel(self, led_count: int) -> Kernel:
+        kernel = self._kernels.get(led_count)
+        if kernel is None:
+            kernel = self._kernels[led_count] = Kernel(self, led_count)
+        return kernel
+
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray:
+        return self._kernel(len(frame))(frame, init=init)
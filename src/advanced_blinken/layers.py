@@ -0,0 +1,116 @@
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from .strand import FrameTransitionFunction, TransitionFunction, is_frame_transition, per_pixel
+
+BlendFunction = Callable[[np.ndarray, np.ndarray, np.ndarray], None]
+
+
+def _add(base: np.ndarray, top: np.ndarray, out: np.ndarray):
+    np.add(base, top, out=out)
+    np.minimum(out, 255, out=out)
+
+
+def _multiply(base: np.ndarray, top: np.ndarray, out: np.ndarray):
+    np.multiply(base, top, out=out)
+    out *= 1 / 255
+
+
+def _screen(base: np.ndarray, top: np.ndarray, out: np.ndarray):
+    np.subtract(255, base, out=out)
+    out *= 255 - top
+    out *= -1 / 255
+    out += 255
+
+
+def _alpha(base: np.ndarray, top: np.ndarray, out: np.ndarray):
+    np.copyto(out, top)
+
+
+def _max(base: np.ndarray, top: np.ndarray, out: np.ndarray):
+    np.maximum(base, top, out=out)
+
+
+# Blend modes, as `(base, top, out)` functions on float arrays in [0, 255].
+# The layer's opacity then mixes `out` with `base`.
+BLEND_MODES: Dict[str, BlendFunction] = dict(add=_add, multiply=_multiply, screen=_screen, alpha=_alpha, max=_max)
+
+
+class Layer:
+    """One animation in a LayerStack, with its own frame, blend mode and opacity."""
+    def __init__(self, func: Union[TransitionFunction, FrameTransitionFunction], blend: str = 'add',
+                 opacity: float = 1.0, visible: bool = True):
+        if blend not in BLEND_MODES:
+            raise ValueError(f'Invalid blend mode: {blend=}, expected one of {sorted(BLEND_MODES)}')
+        self.func = func
+        self._frame_func = func if is_frame_transition(func) else per_pixel(func)
+        self.blend = blend
+        self.opacity = opacity
+        self.visible = visible
+        self.frame: Optional[np.ndarray] = None
+
+    def step(self, shape, init: bool = False) -> np.ndarray:
+        if init is True or self.frame is None or self.frame.shape != shape:
+            self.frame = self._frame_func(np.zeros(shape, dtype=np.uint8), init=True)
+        else:
+            self.frame = self._frame_func(self.frame, init=False)
+        return self.frame
+
+
+class LayerStack:
+    """Composites several animations into one frame.
+
+    Every layer steps its own animation on its own frame, and the frames are
+    blended bottom to top onto black. Each layer costs a handful of whole-array
+    operations on one preallocated float buffer, however long the strand.
+
+        stack = LayerStack(Layer(Animations.rainbow_cycle),
+                           Layer(Animations.sparkle(len(strand)), blend='screen', opacity=.8))
+        strand.transition_function = stack
+
+    The stack itself is a frame transition function; the frame Strand passes
+    in is not used, since every layer keeps its own.
+    """
+    is_frame_transition = True
+
+    def __init__(self, *layers: Layer):
+        self.layers: List[Layer] = list(layers)
+        self._base: Optional[np.ndarray] = None
+        self._blended: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __getitem__(self, i) -> Layer:
+        return self.layers[i]
+
+    def add(self, func: Union[TransitionFunction, FrameTransitionFunction], blend: str = 'add',
+            opacity: float = 1.0) -> Layer:
+        """Put a new layer on top of the stack."""
+        layer = Layer(func, blend, opacity)
+        self.layers.append(layer)
+        return layer
+
+    def remove(self, layer: Layer):
+        self.layers.remove(layer)
+
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray:
+        if self._base is None or self._base.shape != frame.shape:
+            self._base = np.empty(frame.shape, dtype=np.float32)
+            self._blended = np.empty(frame.shape, dtype=np.float32)
+        base, blended = self._base, self._blended
+        base.fill(0)
+        for layer in self.layers:
+            top = layer.step(frame.shape, init=init)
+            if not layer.visible or layer.opacity <= 0:
+                continue
+            BLEND_MODES[layer.blend](base, top, blended)
+            if layer.opacity >= 1:
+                base, blended = blended, base
+            else:
+                blended -= base
+                blended *= layer.opacity
+                base += blended
+        self._base, self._blended = base, blended
+        return np.rint(base).astype(np.uint8)
@@ -1,30 +1,160 @@
+import shutil
 import sys
-from rich.segment import Segment
-from rich.color import Color as RichColor
+import time
+from threading import RLock, Timer
+from typing import List, Optional, TextIO, Tuple, Union
+
+import numpy as np
 from rich.console import Console, ConsoleOptions, RenderResult
-from .color import Color
+from .color import ColorValue
+
+
+class AnsiRenderer:
+    """Draws the strip as a row of cells with raw 24-bit color ANSI escapes.
+
+    After the first full draw only the cells whose color changed are redrawn,
+    by moving the cursor to them, and frames that arrive faster than max_fps
+    are held back so the terminal never becomes the bottleneck. A held back
+    frame is replaced by any newer one, and drawn as soon as the interval has
+    passed if none comes, so the terminal always ends up showing the strip's
+    last state. Strips longer than the terminal wrap onto further rows.
+    """
+    CELL = '▄'
+
+    def __init__(self, stream: Optional[TextIO] = None, max_fps: float = 30, width: Optional[int] = None,
+                 clock=time.monotonic):
+        self._stream = stream if stream is not None else sys.stdout
+        self._interval = 1.0 / max_fps if max_fps else 0.0
+        self._width = width
+        self._clock = clock
+        self._drawn: Optional[np.ndarray] = None
+        self._last = None
+        self._lock = RLock()
+        self._pending: Optional[Tuple[np.ndarray, str]] = None
+        self._timer: Optional[Timer] = None
+
+    def render(self, leds: np.ndarray, end: str = '\r') -> bool:
+        """Draw leds (packed 24-bit values); returns False if the frame was held back."""
+        with self._lock:
+            now = self._clock()
+            if self._last is not None and now - self._last < self._interval:
+                if self._pending is None:
+                    self._timer = Timer(self._interval - (now - self._last), self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                self._pending = (leds.copy(), end)
+                return False
+            self._cancel()
+            self._draw(leds, end, now)
+            return True
+
+    def flush(self):
+        """Draw the frame held back by the refresh rate cap, if there is one."""
+        with self._lock:
+            pending = self._pending
+            self._cancel()
+            if pending is not None:
+                self._draw(*pending, self._clock())
+
+    def _cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = None
+
+    def _draw(self, leds: np.ndarray, end: str, now: float):
+        self._last = now
+        if end != '\r':
+            # Output scrolls, so there is nothing on screen to diff against.
+            out = self._full(leds) + end
+            self._drawn = None
+        elif self._drawn is None or len(self._drawn) != len(leds):
+            out = self._full(leds) + self._home(len(leds))
+            self._drawn = leds.copy()
+        else:
+            out = self._diff(leds)
+            self._drawn[:] = leds
+        if out:
+            self._stream.write(out)
+            self._stream.flush()
+
+    @property
+    def width(self) -> int:
+        if self._width is None:
+            self._width = shutil.get_terminal_size().columns
+        return self._width
+
+    def _cells(self, packed: List[int]) -> str:
+        parts = []
+        previous = None
+        for value in packed:
+            if value != previous:
+                r, g, b = (value >> 16) & 255, (value >> 8) & 255, value & 255
+                parts.append(f'\x1b[38;2;{r};{g};{b};48;2;{r};{g};{b}m')
+                previous = value
+            parts.append(self.CELL)
+        return ''.join(parts)
+
+    def _full(self, leds: np.ndarray) -> str:
+        width = self.width
+        rows = [self._cells(leds[i:i + width].tolist()) for i in range(0, len(leds), width)]
+        return '\x1b[0m\r\n'.join(rows) + '\x1b[0m'
+
+    def _home(self, count: int) -> str:
+        rows = max(0, (count - 1) // self.width)
+        return '\r' + (f'\x1b[{rows}A' if rows else '')
+
+    def _diff(self, leds: np.ndarray) -> str:
+        changed = np.flatnonzero(leds != self._drawn)
+        if len(changed) == 0:
+            return ''
+        width = self.width
+        rows = changed // width
+        breaks = np.flatnonzero((np.diff(changed) > 1) | (np.diff(rows) != 0)) + 1
+        out = []
+        for run in np.split(changed, breaks):
+            row, column = divmod(int(run[0]), width)
+            down, up = (f'\x1b[{row}B', f'\x1b[{row}A') if row else ('', '')
+            out.append(f'{down}\x1b[{column + 1}G{self._cells(leds[run[0]:run[-1] + 1].tolist())}\x1b[0m{up}')
+        out.append('\r')
+        return ''.join(out)
+
+
+class NullRenderer:
+    """Discards frames; for running the mock headless, e.g. in benchmarks."""
+    def __init__(self):
+        self.frames = 0
+
+    def render(self, leds: np.ndarray, end: str = '\r') -> bool:
+        self.frames += 1
+        return True
+
 
 class PixelStrip:
+    default_renderer = AnsiRenderer
+
     def __init__(self, num, pin, freq_hz=800000, dma=10, invert=False,
-                 brightness=255, channel=0, strip_type=None, gamma=None):
-        self._leds = [Color(0, 0, 0) for i in range(num)]
-        self._console = Console()
+                 brightness=255, channel=0, strip_type=None, gamma=None, renderer=None):
+        self._leds = np.zeros(num, dtype=np.uint32)
+        self._renderer = renderer if renderer is not None else PixelStrip.default_renderer()
 
     def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
-        for pix in self._leds:
-            yield pix.show()
+        for pix in self._leds.tolist():
+            yield ColorValue(pix).show()
 
     def __getitem__(self, pos):
         """Return the 24-bit RGB color value at the provided position or slice
         of positions.
         """
+        if isinstance(pos, slice):
+            return self._leds[pos].tolist()
         return int(self._leds[pos])
 
     def __setitem__(self, pos, value):
         """Set the 24-bit RGB color value at the provided position or slice of
         positions.
         """
-        self._leds[pos].rgb = value
+        self._leds[pos] = value
 
     def __len__(self):
         return len(self._leds)
@@ -41,11 +171,13 @@ class PixelStrip:
         """
         pass
 
+    @property
+    def renderer(self):
+        return self._renderer
+
     def show(self, end='\r'):
         """Update the display with the data from the LED buffer."""
-        with self._console.capture() as capture:
-            self._console.print(self, end=end)
-        print(capture.get(), end=end)
+        self._renderer.render(self._leds, end=end)
 
     def setPixelColor(self, n, color):
         """Set LED at position n to the provided 24-bit color value (in RGB order).
@@ -57,9 +189,17 @@ class PixelStrip:
         Each color component should be a value from 0 to 255 (where 0 is the
         lowest intensity and 255 is the highest intensity).
         """
-        #print("\tsetPixelColorRGB1", self._leds[n].hsv)
-        self._leds[n] = Color(_r=red, _g=green, _b=blue)
-        #print("\tsetPixelColorRGB2", self._leds[n].hsv)
+        self._leds[n] = (red << 16) | (green << 8) | blue
+
+    def setPixelBuffer(self, data: Union[np.ndarray, bytes], offset: int = 0):
+        """Write a run of LEDs starting at offset in one call.
+
+        data is either an array of 24-bit color values or the raw bytes of one
+        (native-endian uint32 per LED, the layout of the driver's LED buffer).
+        """
+        if not isinstance(data, np.ndarray):
+            data = np.frombuffer(data, dtype=np.uint32)
+        self._leds[offset:offset + len(data)] = data
 
     def getBrightness(self):
         return 255
@@ -74,7 +214,7 @@ class PixelStrip:
         """Return an object which allows access to the LED display data as if
         it were a sequence of 24-bit RGB values.
         """
-        return [int(i) for i in self._leds]
+        return self._leds.tolist()
 
     def numPixels(self):
         """Return the number of pixels in the display."""
@@ -85,7 +225,7 @@ class PixelStrip:
         return int(self[n])
 
     def getPixelColorRGB(self, n):
-        return self._leds[n].rgb
+        return ColorValue(int(self._leds[n])).rgb
 
     def getPixelColorRGBW(self, n):
-        return self._leds[n].rgb
+        return ColorValue(int(self._leds[n])).rgb
@@ -0,0 +1,248 @@
+"""Drive a strand from the network: E1.31 (sACN), Art-Net and Open Pixel Control.
+
+    receiver = NetworkReceiver(len(strand))
+    receiver.start()
+    strand.transition_function = receiver
+    strand.loop()
+
+Packets are written straight into a receive buffer as they arrive, on a
+background thread. The strand picks up whatever the buffer holds at each of
+its own frames, so input faster than the strip's rate simply overwrites
+frames that were never shown, and packets arriving out of sequence are
+dropped.
+"""
+import selectors
+import socket
+import struct
+from threading import Event, Lock, Thread
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+SACN_PORT = 5568
+ARTNET_PORT = 6454
+OPC_PORT = 7890
+
+# A DMX universe carries 512 channels, i.e. 170 RGB pixels.
+UNIVERSE_PIXELS = 170
+
+_SACN_ID = b'ASC-E1.17\0\0\0'
+_SACN_ROOT_VECTOR = 4
+_SACN_FRAMING_VECTOR = 2
+_SACN_HEADER = struct.Struct('>HH12sHI16sHI64sBHBBHHBBHHHB')
+_SACN_TERMINATED = 0x40
+_ARTNET_ID = b'Art-Net\0'
+_ARTNET_DMX = 0x5000
+_ARTNET_HEADER = struct.Struct('<8sHBBBBH')
+# The data length is the one big-endian field in an otherwise little-endian header.
+_ARTNET_LENGTH = struct.Struct('>H')
+_OPC_HEADER = struct.Struct('>BBH')
+_OPC_SET_PIXELS = 0
+
+
+def _in_sequence(last: Optional[int], sequence: int) -> bool:
+    # E1.31 6.7.2: a packet up to 20 behind the last one is out of order.
+    return last is None or not -20 < (sequence - last + 128) % 256 - 128 <= 0
+
+
+class NetworkReceiver:
+    """Receives pixel data over sACN, Art-Net and OPC into one frame.
+
+    universes maps a universe number onto the first pixel it sets; by default
+    universes first_universe, first_universe + 1, ... cover the strand 170
+    pixels at a time. Art-Net port-address n counts as universe n + 1, the
+    numbering consoles use when they output the same show on both protocols.
+    OPC messages for channel 0 (broadcast) or opc_channel set pixels from the
+    start of the strand. A port of None turns that protocol off, 0 picks a
+    free port (see addresses).
+
+    A NetworkReceiver is a frame transition function: assign it to
+    Strand.transition_function to show what it receives.
+    """
+    is_frame_transition = True
+
+    def __init__(self, led_count: int, universes: Optional[Mapping[int, int]] = None, first_universe: int = 1,
+                 host: str = '', sacn_port: Optional[int] = SACN_PORT, artnet_port: Optional[int] = ARTNET_PORT,
+                 opc_port: Optional[int] = OPC_PORT, opc_channel: int = 1, multicast: bool = True):
+        self._frame = np.zeros((led_count, 3), dtype=np.uint8)
+        self._flat = self._frame.reshape(-1)
+        if universes is None:
+            count = -(-led_count // UNIVERSE_PIXELS)
+            universes = {first_universe + i: i * UNIVERSE_PIXELS for i in range(count)}
+        self.universes = dict(universes)
+        self.opc_channel = opc_channel
+        self._sequences: Dict[Tuple[str, int], int] = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._selector = selectors.DefaultSelector()
+        self._thread: Optional[Thread] = None
+        self.packets = 0
+        self.dropped = 0
+        self.updates = 0
+        self.addresses: Dict[str, Tuple[str, int]] = {}
+
+        if sacn_port is not None:
+            sock = self._udp(host, sacn_port, 'sacn', self._on_sacn)
+            if multicast:
+                for universe in self.universes:
+                    group = socket.inet_aton(f'239.255.{universe >> 8 & 255}.{universe & 255}')
+                    try:
+                        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                        group + socket.inet_aton('0.0.0.0'))
+                    except OSError:
+                        # No multicast route (e.g. loopback only); unicast still works.
+                        break
+        if artnet_port is not None:
+            self._udp(host, artnet_port, 'artnet', self._on_artnet)
+        if opc_port is not None:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host, opc_port))
+            server.listen()
+            server.setblocking(False)
+            self._selector.register(server, selectors.EVENT_READ, self._on_opc_connect)
+            self.addresses['opc'] = server.getsockname()
+
+    def _udp(self, host: str, port: int, name: str, handler) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.setblocking(False)
+        self._selector.register(sock, selectors.EVENT_READ, handler)
+        self.addresses[name] = sock.getsockname()
+        return sock
+
+    @property
+    def frame(self) -> np.ndarray:
+        """A copy of the frame received so far."""
+        with self._lock:
+            return self._frame.copy()
+
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray:
+        if len(frame) != len(self._frame):
+            raise ValueError(f'Receiver is for {len(self._frame)} LEDs, strand has {len(frame)}')
+        return self.frame
+
+    def start(self) -> 'NetworkReceiver':
+        self._thread = Thread(target=self._run, name='NetworkReceiver', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self._selector.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            for key, _ in self._selector.select(timeout=.1):
+                key.data(key.fileobj)
+
+    def _write(self, start_pixel: int, data: memoryview, pixels: Optional[int] = None):
+        """Write data from start_pixel on, but no further than `pixels` pixels or the end of the frame."""
+        offset = start_pixel * 3
+        count = max(0, min(len(data), len(self._flat) - offset, len(data) if pixels is None else pixels * 3))
+        with self._lock:
+            self._flat[offset:offset + count] = np.frombuffer(data, dtype=np.uint8, count=count)
+        self.updates += 1
+
+    def _accept(self, protocol: str, universe: int, sequence: Optional[int]) -> Optional[int]:
+        """The first pixel of universe, or None if the packet is to be dropped."""
+        start = self.universes.get(universe)
+        if start is None:
+            return None
+        if sequence is not None:
+            key = (protocol, universe)
+            if not _in_sequence(self._sequences.get(key), sequence):
+                self.dropped += 1
+                return None
+            self._sequences[key] = sequence
+        return start
+
+    def _on_sacn(self, sock: socket.socket):
+        for packet in self._receive(sock):
+            if len(packet) < _SACN_HEADER.size:
+                continue
+            (_, _, acn_id, _, root_vector, _, _, framing_vector, _, _, _, sequence, options, universe,
+             _, _, _, _, _, count, start_code) = _SACN_HEADER.unpack_from(packet)
+            if (acn_id != _SACN_ID or root_vector != _SACN_ROOT_VECTOR or framing_vector != _SACN_FRAMING_VECTOR
+                    or options & _SACN_TERMINATED or start_code != 0):
+                continue
+            start = self._accept('sacn', universe, sequence)
+            if start is not None:
+                # A full universe of 512 slots has 2 left over after 170 pixels;
+                # they must not spill into the next universe.
+                self._write(start, packet[_SACN_HEADER.size:_SACN_HEADER.size + count - 1], UNIVERSE_PIXELS)
+
+    def _on_artnet(self, sock: socket.socket):
+        for packet in self._receive(sock):
+            header = _ARTNET_HEADER.size + _ARTNET_LENGTH.size
+            if len(packet) < header:
+                continue
+            art_id, opcode, _, _, sequence, _, port_address = _ARTNET_HEADER.unpack_from(packet)
+            if art_id != _ARTNET_ID or opcode != _ARTNET_DMX:
+                continue
+            length, = _ARTNET_LENGTH.unpack_from(packet, _ARTNET_HEADER.size)
+            start = self._accept('artnet', (port_address & 0x7fff) + 1, sequence or None)
+            if start is not None:
+                self._write(start, packet[header:header + length], UNIVERSE_PIXELS)
+
+    def _receive(self, sock: socket.socket):
+        """Every datagram waiting on sock; only the newest per universe ends up in the frame anyway."""
+        while True:
+            try:
+                packet = memoryview(sock.recv(1500))
+            except BlockingIOError:
+                return
+            self.packets += 1
+            yield packet
+
+    def _on_opc_connect(self, server: socket.socket):
+        conn, _ = server.accept()
+        conn.setblocking(False)
+        self._selector.register(conn, selectors.EVENT_READ, _OpcConnection(self).on_read)
+
+    def _on_opc(self, channel: int, command: int, data: memoryview):
+        self.packets += 1
+        if command == _OPC_SET_PIXELS and channel in (0, self.opc_channel):
+            self._write(0, data)
+
+
+class _OpcConnection:
+    """Splits an OPC TCP stream into messages."""
+    def __init__(self, receiver: NetworkReceiver):
+        self._receiver = receiver
+        self._buffer = bytearray()
+
+    def on_read(self, conn: socket.socket):
+        try:
+            data = conn.recv(1 << 16)
+        except BlockingIOError:
+            return
+        except ConnectionError:
+            data = b''
+        if not data:
+            self._receiver._selector.unregister(conn)
+            conn.close()
+            return
+        self._buffer += data
+        view, offset = memoryview(self._buffer), 0
+        while len(view) - offset >= _OPC_HEADER.size:
+            channel, command, length = _OPC_HEADER.unpack_from(view, offset)
+            end = offset + _OPC_HEADER.size + length
+            if end > len(view):
+                break
+            self._receiver._on_opc(channel, command, view[offset + _OPC_HEADER.size:end])
+            offset = end
+        view.release()
+        del self._buffer[:offset]
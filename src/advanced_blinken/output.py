@@ -0,0 +1,114 @@
+from typing import Optional
+
+import numpy as np
+
+# Full scale of the 16-bit output values: 255 << 8, so that the top byte of
+# every value is a valid 8-bit level and the low byte is the fraction.
+_FULL = 255 << 8
+
+
+class OutputStage:
+    """Gamma, brightness and temporal dithering between the frame and the LEDs.
+
+    Frames are 8-bit and perceptual; LEDs are linear, so dim colors need finer
+    steps than 8 bits give once gamma is applied. One lookup table maps frame
+    values through gamma and brightness to 16-bit linear values in a single
+    vectorized pass. With `dither`, each pixel carries the fraction that the
+    8-bit output could not show over to its next output (first-order
+    sigma-delta), so averaged over a few refreshes every LED shows its exact
+    16-bit level. That only pays off if the strip is pushed more often than
+    the animation steps: see Strand.loop(refresh_hz=...).
+
+    brightness applies on top of the driver's own max_brightness; leave that
+    at 255 when using this stage so the dimming happens here, in 16 bits.
+    """
+    def __init__(self, gamma: float = 2.2, brightness: float = 1.0, dither: bool = True):
+        self._gamma = gamma
+        self._brightness = brightness
+        self.dither = dither
+        self._error: Optional[np.ndarray] = None
+        self._build()
+
+    @property
+    def gamma(self) -> float:
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, gamma: float):
+        self._gamma = gamma
+        self._build()
+
+    @property
+    def brightness(self) -> float:
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness: float):
+        if not 0 <= brightness <= 1:
+            raise ValueError(f'Invalid brightness: {brightness=}')
+        self._brightness = brightness
+        self._build()
+
+    @property
+    def lut(self) -> np.ndarray:
+        """The 256 entry table from frame values to 16-bit output values."""
+        return self._lut
+
+    def _build(self):
+        levels = np.arange(256) / 255
+        self._lut = np.round(levels ** self._gamma * self._brightness * _FULL).astype(np.uint16)
+
+    def linear(self, frame: np.ndarray) -> np.ndarray:
+        """The frame's 16-bit output values, before dithering."""
+        return self._lut[frame]
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """The 8-bit values to push for frame; successive calls dither."""
+        value = self._lut[frame]
+        if not self.dither:
+            return ((value + 128) >> 8).astype(np.uint8)
+        if self._error is None or self._error.shape != value.shape:
+            self._error = np.zeros_like(value)
+        # At most _FULL + 255, which still fits in 16 bits.
+        value += self._error
+        np.bitwise_and(value, 255, out=self._error)
+        return (value >> 8).astype(np.uint8)
+
+
+class PowerLimiter:
+    """Scales frames down so that the strip's estimated current stays under a budget.
+
+    The estimate is linear in the pushed values: each channel draws up to
+    `ma_per_channel` (red, green, blue) milliamps at 255, plus `idle_ma` per
+    LED for its controller, the typical WS2812B figures by default. Frames
+    over budget are scaled uniformly, which keeps their colors. The estimate
+    is a few per-channel sums, so it costs microseconds even on long strands.
+    """
+    def __init__(self, budget_ma: float, ma_per_channel=(20.0, 20.0, 20.0), idle_ma: float = 1.0):
+        self.budget_ma = budget_ma
+        self.ma_per_channel = np.asarray(ma_per_channel, dtype=np.float64) / 255
+        self.idle_ma = idle_ma
+        self.estimated_ma = 0.0
+        self.drawn_ma = 0.0
+        self.scale = 1.0
+        self.limited = 0
+
+    def estimate(self, frame: np.ndarray) -> float:
+        """Estimated draw of frame (as pushed, in RGB order), in mA."""
+        return float(frame.sum(axis=0, dtype=np.uint64) @ self.ma_per_channel) + self.idle_ma * len(frame)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        self.estimated_ma = self.drawn_ma = self.estimate(frame)
+        idle = self.idle_ma * len(frame)
+        if self.estimated_ma <= self.budget_ma:
+            self.scale = 1.0
+            return frame
+        self.scale = max(0.0, self.budget_ma - idle) / (self.estimated_ma - idle)
+        self.limited += 1
+        # Rounding down keeps the scaled frame under budget.
+        frame = (frame * self.scale).astype(np.uint8)
+        self.drawn_ma = self.estimate(frame)
+        return frame
+
+    def stats(self) -> dict:
+        return dict(estimated_ma=self.estimated_ma, drawn_ma=self.drawn_ma, scale=self.scale, limited=self.limited)
@@ -0,0 +1,93 @@
+from typing import Dict, Iterator, Mapping, Tuple
+
+import numpy as np
+
+from .color_value import ColorValue
+from .named_colors import named_colors
+
+
+class _GridIndex:
+    """Exact nearest-neighbour index over a small set of RGB points.
+
+    RGB space is cut into a uniform grid of `cells`^3 boxes. For each box we
+    keep every point that could be the nearest one to *some* color inside it:
+    a point qualifies when its closest possible distance to the box is no more
+    than the smallest farthest-possible distance of any point. A query then
+    only measures the few candidates of its own box, for all pixels at once.
+    """
+    def __init__(self, points: np.ndarray, cells: int = 32):
+        self._shift = 8 - int(np.log2(cells))
+        size = 1 << self._shift
+        points = points.astype(np.int64)
+        lo = np.arange(cells) * size
+        hi = lo + size - 1
+        # Per axis squared distance from every cell's interval to every point.
+        near = np.stack([(np.clip(points[:, k][None, :], lo[:, None], hi[:, None]) - points[:, k][None, :]) ** 2
+                         for k in range(3)])
+        far = np.stack([np.maximum(np.abs(lo[:, None] - points[:, k][None, :]),
+                                   np.abs(hi[:, None] - points[:, k][None, :])) ** 2 for k in range(3)])
+        near = near[0][:, None, None] + near[1][None, :, None] + near[2][None, None, :]
+        far = far[0][:, None, None] + far[1][None, :, None] + far[2][None, None, :]
+        candidates = near <= far.min(axis=-1, keepdims=True)
+        width = int(candidates.sum(axis=-1).max())
+        # Pad each candidate list with a sentinel that is never the closest.
+        order = np.argsort(~candidates, axis=-1, kind='stable')[..., :width]
+        self._candidates = np.where(np.take_along_axis(candidates, order, axis=-1), order, len(points)).astype(np.int16)
+        self._points = np.vstack([points, np.full((1, 3), 1 << 12)]).astype(np.int32)
+
+    def query(self, rgb: np.ndarray) -> np.ndarray:
+        rgb = np.asarray(rgb).reshape(-1, 3)
+        cell = rgb >> self._shift
+        candidates = self._candidates[cell[:, 0], cell[:, 1], cell[:, 2]]
+        diff = self._points[candidates] - rgb[:, None, :].astype(np.int32)
+        best = (diff * diff).sum(axis=-1).argmin(axis=-1)
+        return np.take_along_axis(candidates, best[:, None], axis=-1)[:, 0]
+
+
+class Palette(Mapping):
+    """The named colors, interned once as immutable ColorValues.
+
+    Also keeps array forms of the table (`rgb`, `packed`) and an index for
+    snapping whole frames to their nearest named color.
+    """
+    def __init__(self, table: dict = named_colors):
+        table = dict(table)
+        families = table.pop('families', {})
+        for family in families.values():
+            for name, rgb in family.items():
+                table.setdefault(name, rgb)
+
+        self.names: Tuple[str, ...] = tuple(table)
+        self.rgb = np.array([table[name] for name in self.names], dtype=np.uint8)
+        self.packed = (self.rgb[:, 0].astype(np.uint32) << 16) | (self.rgb[:, 1].astype(np.uint32) << 8) | self.rgb[:, 2]
+        self._colors: Dict[str, ColorValue] = {name: ColorValue(int(packed)) for name, packed in zip(self.names, self.packed)}
+        self.families: Dict[str, Dict[str, ColorValue]] = {
+            family: {name: self._colors[name] for name in members} for family, members in families.items()
+        }
+        self._index = None
+
+    def __getitem__(self, name: str) -> ColorValue:
+        return self._colors[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest_index(self, rgb: np.ndarray) -> np.ndarray:
+        """Index into `names` of the closest named color for each pixel of an (..., 3) RGB array."""
+        if self._index is None:
+            self._index = _GridIndex(self.rgb)
+        rgb = np.asarray(rgb)
+        return self._index.query(rgb).reshape(rgb.shape[:-1])
+
+    def nearest_name(self, color: ColorValue) -> str:
+        return self.names[int(self.nearest_index(np.array(color.rgb, dtype=np.uint8)))]
+
+    def quantize(self, rgb: np.ndarray) -> np.ndarray:
+        """Snap every pixel of an RGB frame to its closest named color."""
+        return self.rgb[self.nearest_index(rgb)]
+
+
+palette = Palette()
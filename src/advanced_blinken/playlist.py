@@ -0,0 +1,173 @@
+"""Run a sequence of animations, crossfading from one to the next.
+
+    playlist = Playlist(fade=2)
+    playlist.add(Animations.rainbow_cycle, duration=30)
+    playlist.add(Animations.rainbow_chase(), duration=20)
+    playlist.add(Animations.sparkle(len(strand)), duration=10, fade=.5)
+    strand.transition_function = playlist
+    strand.loop()
+
+Assigning Strand.transition_function initializes the new animation on the
+spot, which can take long enough to hold up a frame. A Playlist is assigned
+once and switches between its entries itself: as soon as an entry starts
+showing, the one after it is compiled and initialized on a background thread,
+so by the time it is due it only has to step like any other frame. If it is
+not ready in time, the current entry stays on until it is, rather than the
+output waiting for it.
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+from .layers import Layer
+from .strand import FrameTransitionFunction, TransitionFunction
+
+
+class Entry:
+    """One animation in a Playlist.
+
+    duration: seconds from the start of its fade in until the next entry starts fading in
+    fade: seconds to crossfade in from the previous entry; None for the playlist's default
+    """
+    def __init__(self, func: Union[TransitionFunction, FrameTransitionFunction], duration: float,
+                 fade: Optional[float] = None):
+        if duration <= 0:
+            raise ValueError(f'Invalid duration: {duration=}')
+        self.func = func
+        self.duration = duration
+        self.fade = fade
+        self._layer: Optional[Layer] = None
+
+    def warm(self, shape):
+        """Compile and initialize the animation for a frame of `shape`."""
+        func = self.func
+        if hasattr(func, 'compile'):
+            # A Program (see kernels.py): compile it for the strand's length,
+            # as Strand would.
+            func = func.compile(shape[0])
+        self._layer = Layer(func)
+        self._layer.step(shape, init=True)
+
+    def step(self, shape) -> np.ndarray:
+        return self._layer.step(shape)
+
+
+class Playlist:
+    """A frame transition function that plays its entries in order; see the module docstring.
+
+    Between two entries, the outgoing and incoming animations both step, and
+    their frames are mixed with 8-bit fixed point weights in two preallocated
+    buffers. With `loop`, the playlist starts over after the last entry;
+    otherwise the last one stays on. `late` counts the frames an entry stayed
+    on past its duration because the next one was still initializing.
+    """
+    is_frame_transition = True
+
+    def __init__(self, entries: Optional[List[Entry]] = None, fade: float = 1.0, loop: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        self.entries: List[Entry] = list(entries or [])
+        self.fade = fade
+        self.loop = loop
+        self.clock = clock
+        self.late = 0
+        self._index = 0
+        self._start = 0.0
+        self._fade_start: Optional[float] = None
+        # The entry being faded in, and the one warmed (or warming) up to be next.
+        self._incoming: Optional[int] = None
+        self._warmed: Optional[int] = None
+        self._warming: Optional[Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._mix: Optional[np.ndarray] = None
+        self._scratch: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, i) -> Entry:
+        return self.entries[i]
+
+    def add(self, func: Union[TransitionFunction, FrameTransitionFunction], duration: float,
+            fade: Optional[float] = None) -> Entry:
+        """Put a new entry at the end of the playlist."""
+        entry = Entry(func, duration, fade)
+        self.entries.append(entry)
+        return entry
+
+    @property
+    def current(self) -> Entry:
+        return self.entries[self._index]
+
+    def _next_index(self) -> Optional[int]:
+        if self._index + 1 < len(self.entries):
+            return self._index + 1
+        return 0 if self.loop and len(self.entries) > 1 else None
+
+    def _fade_of(self, entry: Entry) -> float:
+        return self.fade if entry.fade is None else entry.fade
+
+    def _warm_next(self, shape):
+        index = self._warmed = self._next_index()
+        if index is None:
+            self._warming = None
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix='Playlist')
+        self._warming = self._executor.submit(self.entries[index].warm, shape)
+
+    def close(self):
+        """Stop the background thread; the playlist starts it again if it is used after this."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray:
+        if not self.entries:
+            raise ValueError('Playlist has no entries')
+        now = self.clock()
+        if init is True:
+            if self._warming is not None:
+                self._warming.result()
+            self._index, self._start, self._fade_start = 0, now, None
+            self.current.warm(frame.shape)
+            self._warm_next(frame.shape)
+            return self.current.step(frame.shape)
+
+        outgoing = self.current.step(frame.shape)
+        if self._fade_start is None:
+            index = self._next_index()
+            if index is None:
+                return outgoing
+            if index != self._warmed:
+                # Entries were added since the last one was warmed up.
+                self._warm_next(frame.shape)
+            if now - self._start < self.current.duration:
+                return outgoing
+            if not self._warming.done():
+                self.late += 1
+                return outgoing
+            self._warming.result()
+            self._fade_start, self._incoming = now, index
+        incoming = self.entries[self._incoming]
+        fade = self._fade_of(incoming)
+        progress = (now - self._fade_start) / fade if fade > 0 else 1.0
+        frame = incoming.step(frame.shape)
+        if progress >= 1:
+            self._index, self._start, self._fade_start = self._incoming, self._fade_start, None
+            self._warm_next(frame.shape)
+            return frame
+        return self._crossfade(outgoing, frame, progress)
+
+    def _crossfade(self, outgoing: np.ndarray, incoming: np.ndarray, progress: float) -> np.ndarray:
+        if self._mix is None or self._mix.shape != outgoing.shape:
+            self._mix = np.empty(outgoing.shape, dtype=np.uint16)
+            self._scratch = np.empty(outgoing.shape, dtype=np.uint16)
+        weight = int(round(progress * 256))
+        np.multiply(incoming, weight, out=self._mix, dtype=np.uint16)
+        np.multiply(outgoing, 256 - weight, out=self._scratch, dtype=np.uint16)
+        self._mix += self._scratch
+        self._mix += 128
+        self._mix >>= 8
+        return self._mix.astype(np.uint8)
@@ -0,0 +1,122 @@
+import os
+import struct
+from threading import Event
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+from .scheduler import FrameScheduler
+
+# File layout: a fixed 32 byte little-endian header (magic, version, flags, LED
+# count, frame rate, color order), then the frames back to back as raw
+# (led_count, 3) uint8 RGB rows. Frames are stored as plain RGB; the color order
+# the recording strand pushed with is kept in the header for reference only,
+# since the strand that plays it back applies its own.
+MAGIC = b'BLNK'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHIf4s12x')
+
+
+class FrameRecorder:
+    """Appends frames to a recording file; see Strand.record()."""
+    def __init__(self, path: str, led_count: int, fps: float, color_order: str = 'RGB'):
+        self._file: BinaryIO = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0, led_count, fps, color_order.encode('ascii')))
+        self.led_count = led_count
+        self.frames = 0
+
+    def write(self, frame: np.ndarray):
+        if frame.shape != (self.led_count, 3):
+            raise ValueError(f'Invalid frame: {frame.shape=}, expected ({self.led_count}, 3)')
+        self._file.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """A recording file, memory-mapped.
+
+    Frames are read straight out of the page cache on demand, so opening,
+    seeking and looping cost nothing however long the recording is.
+    """
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f'Not a recording: {path=}')
+        magic, version, _, self.led_count, self.fps, order = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Not a recording: {path=}, {magic=}, {version=}')
+        self.color_order = order.rstrip(b'\0').decode('ascii')
+        frame_bytes = self.led_count * 3
+        size = os.path.getsize(path) - _HEADER.size
+        if size < frame_bytes:
+            self._frames = np.zeros((0, self.led_count, 3), dtype=np.uint8)
+        else:
+            data = np.memmap(path, dtype=np.uint8, mode='r', offset=_HEADER.size, shape=(size - size % frame_bytes, ))
+            self._frames = data.reshape(-1, self.led_count, 3)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, i) -> np.ndarray:
+        return self._frames[i]
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.fps if self.fps else 0.0
+
+
+class FramePlayer:
+    """Streams a Recording to a Strand at the recorded frame rate.
+
+    Frames go from the memory map to the strand's backend without any
+    per-pixel Python work; looping and seeking only move the position.
+    """
+    def __init__(self, strand, recording: Union[str, Recording], loop: bool = True, fps: Optional[float] = None):
+        if not isinstance(recording, Recording):
+            recording = Recording(recording)
+        if recording.led_count != len(strand):
+            raise ValueError(f'Recording is for {recording.led_count} LEDs, strand has {len(strand)}')
+        self.strand = strand
+        self.recording = recording
+        self.loop = loop
+        self.position = 0
+        fps = fps or recording.fps
+        self._scheduler = FrameScheduler(1.0 / fps if fps else 0.0)
+
+    def seek(self, frame: int = 0, seconds: Optional[float] = None):
+        if seconds is not None:
+            frame = int(seconds * self.recording.fps)
+        if self.loop and len(self.recording) > 0:
+            self.position = frame % len(self.recording)
+        else:
+            self.position = min(max(frame, 0), len(self.recording))
+
+    def step(self) -> bool:
+        """Show the frame at the current position; returns False at the end of the recording."""
+        if self.position >= len(self.recording):
+            if not self.loop or len(self.recording) == 0:
+                return False
+            self.position = 0
+        self.strand._lock(np.array(self.recording[self.position]))
+        self.strand.stats.end_frame()
+        self.position += 1
+        return True
+
+    def play(self, frames: Optional[int] = None, stop: Optional[Event] = None):
+        stop = stop if stop is not None else self.strand._exitEvent
+        self._scheduler.start()
+        while not stop.is_set() and (frames is None or frames > 0):
+            if frames is not None:
+                frames -= 1
+            if not self.step() or not self._scheduler.wait(stop):
+                break
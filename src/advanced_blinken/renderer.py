@@ -0,0 +1,183 @@
+import os
+import random
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class FrameRenderer(Thread):
+    """Renders frames ahead of the output on a background thread.
+
+    Finished frames go into a ring of `depth` preallocated buffers, plus one
+    more for the frame the consumer is copying out. The thread blocks when the
+    ring is full, so it stays at most `depth` frames ahead. A frame that takes
+    longer than one period to compute eats into that lead instead of holding
+    up the output, and computing the next frame overlaps pushing the current
+    one.
+    """
+    def __init__(self, func, frame: np.ndarray, depth: int = 2):
+        super().__init__(name='FrameRenderer', daemon=True)
+        if depth < 1:
+            raise ValueError(f'Invalid lookahead depth: {depth=}')
+        self._ring = np.empty((depth + 1, ) + frame.shape, dtype=frame.dtype)
+        self._free = Queue()
+        self._ready = Queue()
+        for i in range(depth + 1):
+            self._free.put(i)
+        self._func = func
+        self._frame = frame.copy()
+        self._lock = Lock()
+        self._stopped = Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._ring) - 1
+
+    @property
+    def queued(self) -> int:
+        """Number of rendered frames waiting to be shown."""
+        return self._ready.qsize()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                i = self._free.get(timeout=.1)
+            except Empty:
+                continue
+            with self._lock:
+                try:
+                    self._frame = self._func(self._frame, init=False)
+                except BaseException as ex:
+                    self._error = ex
+                    self._ready.put(None)
+                    return
+                np.copyto(self._ring[i], self._frame)
+                self._ready.put(i)
+
+    def next_frame(self, out: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Copy the oldest rendered frame into `out`, waiting for one if needed."""
+        i = self._ready.get(timeout=timeout)
+        if i is None:
+            raise RuntimeError('FrameRenderer stopped on an exception') from self._error
+        np.copyto(out, self._ring[i])
+        self._free.put(i)
+        return out
+
+    def reseed(self, func, frame: np.ndarray):
+        """Throw away queued frames and carry on from `frame` with `func`."""
+        with self._lock:
+            self._func = func
+            self._frame = frame.copy()
+            while True:
+                try:
+                    i = self._ready.get_nowait()
+                except Empty:
+                    break
+                if i is not None:
+                    self._free.put(i)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _render_segment(func, buffers: np.ndarray, region: slice, conn):
+    # Forked workers start with the parent's random state; without reseeding
+    # every segment would draw the same numbers.
+    random.seed()
+    np.random.seed()
+    while True:
+        src = conn.recv()
+        if src is None:
+            break
+        try:
+            buffers[1 - src, region] = func(buffers[src], init=False, region=region)
+        except BaseException as ex:
+            conn.send(ex)
+            break
+        conn.send(None)
+    conn.close()
+
+
+class SegmentRenderer:
+    """Renders each frame in index-range segments on worker processes.
+
+    The frame lives in two `multiprocessing.shared_memory` buffers: workers
+    read the whole of the current one, so functions can look at neighbouring
+    pixels outside their own range, and each writes its range of the other
+    one. The parent gets the assembled frame back as a view of shared memory,
+    without a copy, and the roles of the buffers swap every frame.
+
+    func has to be segmented (see strand.segmented). Workers are forked so
+    they inherit func as it is, closures and state included; a function that
+    keeps state does so per worker, which is fine as long as it only keeps it
+    for its own pixels.
+    """
+    def __init__(self, func, frame: np.ndarray, processes: Optional[int] = None):
+        processes = processes or os.cpu_count()
+        if not 0 < processes <= len(frame):
+            raise ValueError(f'Invalid number of processes: {processes=} for {len(frame)} LEDs')
+        self._shm = SharedMemory(create=True, size=2 * frame.nbytes)
+        self._buffers = np.ndarray((2, ) + frame.shape, dtype=frame.dtype, buffer=self._shm.buf)
+        self._current = 0
+        self._buffers[0] = frame
+        bounds = np.linspace(0, len(frame), processes + 1).astype(int).tolist()
+        self.regions = [slice(start, stop) for start, stop in zip(bounds, bounds[1:])]
+        self._workers: List[Tuple[BaseProcess, Connection]] = []
+        self._start(func)
+
+    def _start(self, func):
+        context = get_context('fork')
+        for region in self.regions:
+            conn, child = context.Pipe()
+            worker = context.Process(target=_render_segment, args=(func, self._buffers, region, child),
+                                     name=f'SegmentRenderer-{region.start}', daemon=True)
+            worker.start()
+            child.close()
+            self._workers.append((worker, conn))
+
+    def _join(self):
+        for worker, conn in self._workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker.join()
+            conn.close()
+        self._workers = []
+
+    @property
+    def processes(self) -> int:
+        return len(self._workers)
+
+    def next_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Render the frame after `frame`; the result is only valid until the next call."""
+        if not np.shares_memory(frame, self._buffers[self._current]):
+            np.copyto(self._buffers[self._current], frame)
+        for _, conn in self._workers:
+            conn.send(self._current)
+        errors = [conn.recv() for _, conn in self._workers]
+        error = next((error for error in errors if error is not None), None)
+        if error is not None:
+            raise RuntimeError('SegmentRenderer worker stopped on an exception') from error
+        self._current = 1 - self._current
+        return self._buffers[self._current]
+
+    def reseed(self, func, frame: np.ndarray):
+        """Restart the workers with `func`, carrying on from `frame`."""
+        self._join()
+        np.copyto(self._buffers[self._current], frame)
+        self._start(func)
+
+    def stop(self):
+        self._join()
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import deque
+from threading import Event
+from typing import Callable, Optional
+
+
+class FrameScheduler:
+    """Fixed-timestep frame clock.
+
+    Frames are due on an absolute grid (`start + n * period`), so the time spent
+    rendering and pushing a frame comes out of the period instead of being added
+    to it, and small overruns do not accumulate into drift.
+
+    A frame that finishes after its deadline counts as missed. By default the
+    next frames then run back to back until the clock is on the grid again. With
+    `skip_frames` the scheduler instead drops every deadline that has already
+    passed, and reports them as skipped, so the show stays in step with wall
+    time at the cost of lost frames. If the schedule falls more than `max_lag`
+    periods behind, it starts again from the current time.
+    """
+    def __init__(self, period: float, skip_frames: bool = False, max_lag: int = 8, window: int = 120,
+                 clock: Callable[[], float] = time.monotonic):
+        self.period = period
+        self.skip_frames = skip_frames
+        self.max_lag = max_lag
+        self._clock = clock
+        self._ticks = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self._deadline = None
+        self._ticks.clear()
+        self.frames = 0
+        self.missed = 0
+        self.skipped = 0
+        self.overrun = 0.0
+        self.max_overrun = 0.0
+
+    def start(self):
+        """Put the first deadline one period from now."""
+        now = self._clock()
+        self._deadline = now + self.period
+        self._ticks.clear()
+        self._ticks.append(now)
+
+    def wait(self, event: Optional[Event] = None) -> bool:
+        """Block until the current frame's deadline and move on to the next one.
+
+        Sleeps on `event` when given, so setting it wakes the caller early.
+        Returns False if that happened.
+        """
+        delay = self._due()
+        if delay > 0:
+            if event is not None:
+                if event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+        self._next()
+        return True
+
+    async def wait_async(self, event: Optional[asyncio.Event] = None) -> bool:
+        """wait() for asyncio: sleeps without blocking the event loop."""
+        delay = self._due()
+        if delay > 0:
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                    return False
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(delay)
+        self._next()
+        return True
+
+    def remaining(self) -> float:
+        """Seconds left until the current frame's deadline (negative once it has passed)."""
+        if self._deadline is None:
+            return 0.0
+        return self._deadline - self._clock()
+
+    def _due(self) -> float:
+        """Count the current frame and return how long is left until its deadline."""
+        if self._deadline is None:
+            self.start()
+        now = self._clock()
+        late = now - self._deadline
+        self.frames += 1
+        if late > 0:
+            self.missed += 1
+            self.overrun = late
+            self.max_overrun = max(self.max_overrun, late)
+            behind = int(late // self.period) if self.period > 0 else 0
+            if self.skip_frames and behind > 0:
+                self.skipped += behind
+                self._deadline += behind * self.period
+            elif behind > self.max_lag:
+                self._deadline = now
+            return 0.0
+        self.overrun = 0.0
+        return -late
+
+    def _next(self):
+        self._deadline += self.period
+        self._ticks.append(self._clock())
+
+    @property
+    def fps(self) -> float:
+        """Frames per second achieved over the last `window` frames."""
+        if len(self._ticks) < 2:
+            return 0.0
+        elapsed = self._ticks[-1] - self._ticks[0]
+        return (len(self._ticks) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        return dict(fps=self.fps, frames=self.frames, missed=self.missed, skipped=self.skipped,
+                    overrun=self.overrun, max_overrun=self.max_overrun)
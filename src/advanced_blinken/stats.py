@@ -0,0 +1,128 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Upper bounds, in seconds, of the histogram buckets exported to Prometheus.
+BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0)
+
+
+class FrameStats:
+    """Per-phase frame timings, cheap enough to leave on.
+
+    Strand records how long each phase of a frame took:
+
+        transition  running the transition function
+        write       diffing the frame, color ordering and writing the backend buffer
+        show        the backend's show(), i.e. the push to the LEDs
+        sleep       waiting for the next frame deadline
+        frame       start of one frame to the start of the next
+
+    Each phase keeps the last `window` samples for percentiles, and a
+    cumulative bucket histogram since start for export. Callbacks added with
+    add_callback() get a dict of the finished frame's timings after every frame.
+    """
+    PHASES = ('transition', 'write', 'show', 'sleep', 'frame')
+
+    def __init__(self, window: int = 512, prometheus_path: Optional[str] = None, export_interval: float = 15.0,
+                 labels: Optional[Dict[str, str]] = None):
+        self.enabled = True
+        self._window = np.zeros((len(self.PHASES), window))
+        self._filled = [0] * len(self.PHASES)
+        self._buckets = np.zeros((len(self.PHASES), len(BUCKETS) + 1), dtype=np.int64)
+        self._sums = [0.0] * len(self.PHASES)
+        self._index = {phase: i for i, phase in enumerate(self.PHASES)}
+        self._current = dict.fromkeys(self.PHASES, 0.0)
+        self._frame_start = None
+        self._callbacks: List[Callable[[Dict[str, float]], None]] = []
+        self.frames = 0
+        self.gauges: Callable[[], Dict[str, float]] = dict
+        self.prometheus_path = prometheus_path
+        self.export_interval = export_interval
+        self.labels = labels or {}
+        self._exported = time.monotonic()
+
+    def record(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        i = self._index[phase]
+        self._window[i, self._filled[i] % self._window.shape[1]] = seconds
+        self._filled[i] += 1
+        self._buckets[i, bisect_left(BUCKETS, seconds)] += 1
+        self._sums[i] += seconds
+        self._current[phase] += seconds
+
+    def end_frame(self):
+        """Close the current frame: record its period and hand its timings to the callbacks."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.record('frame', now - self._frame_start)
+        self._frame_start = now
+        self.frames += 1
+        timings, self._current = self._current, dict.fromkeys(self.PHASES, 0.0)
+        for callback in self._callbacks:
+            callback(timings)
+        if self.prometheus_path is not None and time.monotonic() - self._exported >= self.export_interval:
+            self.write_prometheus(self.prometheus_path)
+
+    def add_callback(self, callback: Callable[[Dict[str, float]], None]):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Dict[str, float]], None]):
+        self._callbacks.remove(callback)
+
+    def samples(self, phase: str) -> np.ndarray:
+        """The most recent samples of a phase, in seconds (oldest order is not kept)."""
+        i = self._index[phase]
+        return self._window[i, :min(self._filled[i], self._window.shape[1])]
+
+    def summary(self, phase: str) -> Dict[str, float]:
+        samples = self.samples(phase)
+        if len(samples) == 0:
+            return dict(count=0, mean=0.0, p50=0.0, p90=0.0, p99=0.0, max=0.0, jitter=0.0)
+        p50, p90, p99 = np.percentile(samples, (50, 90, 99))
+        return dict(count=self._filled[self._index[phase]], mean=float(samples.mean()), p50=float(p50),
+                    p90=float(p90), p99=float(p99), max=float(samples.max()), jitter=float(samples.std()))
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the frame period over the window, in seconds."""
+        return self.summary('frame')['jitter']
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {phase: self.summary(phase) for phase in self.PHASES}
+
+    def prometheus(self) -> str:
+        """The stats in the Prometheus text exposition format."""
+        labels = ''.join(f'{key}="{value}",' for key, value in sorted(self.labels.items()))
+        lines = ['# HELP blinken_phase_seconds Time spent in each phase of a frame.',
+                 '# TYPE blinken_phase_seconds histogram']
+        for i, phase in enumerate(self.PHASES):
+            cumulative = np.cumsum(self._buckets[i]).tolist()
+            for bound, count in zip(BUCKETS + ('+Inf', ), cumulative):
+                lines.append(f'blinken_phase_seconds_bucket{{{labels}phase="{phase}",le="{bound}"}} {count}')
+            lines.append(f'blinken_phase_seconds_sum{{{labels}phase="{phase}"}} {self._sums[i]}')
+            lines.append(f'blinken_phase_seconds_count{{{labels}phase="{phase}"}} {cumulative[-1]}')
+        lines += ['# HELP blinken_frames_total Frames shown.', '# TYPE blinken_frames_total counter',
+                  f'blinken_frames_total{{{labels.rstrip(",")}}} {self.frames}',
+                  '# HELP blinken_frame_jitter_seconds Standard deviation of the recent frame period.',
+                  '# TYPE blinken_frame_jitter_seconds gauge',
+                  f'blinken_frame_jitter_seconds{{{labels.rstrip(",")}}} {self.jitter}']
+        for name, value in sorted(self.gauges().items()):
+            lines += [f'# TYPE blinken_{name} gauge', f'blinken_{name}{{{labels.rstrip(",")}}} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write prometheus() to path for node exporter's textfile collector.
+
+        The file is replaced atomically so the collector never reads half of it.
+        """
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+        self._exported = time.monotonic()
@@ -1,14 +1,24 @@
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 import signal
 import sys
 from threading import Event
 from time import sleep
-from typing import List, Protocol, Tuple, Union, Iterable
+from typing import List, Optional, Protocol, Sequence, Tuple, Union, Iterable
 
+import numpy as np
 import sh
 
-from .color import Color, ColorSpace
+from .cache import CachedAnimation, FrameCache, frame_cache
+from .color import Color, ColorSpace, ColorValue
+from .convert import hsv_to_rgb, pack_rgb, rgb_to_hsv, unpack_rgb
+from .recording import FramePlayer, FrameRecorder
+from .output import OutputStage, PowerLimiter
+from .renderer import FrameRenderer, SegmentRenderer
+from .scheduler import FrameScheduler
+from .stats import FrameStats
 from sh import grep
 MOCK = False
 try:
@@ -18,14 +28,105 @@ except sh.ErrorReturnCode as ex:
     MOCK = True
     from .mock_pixel_strip import PixelStrip
 
-TColor = Union[Tuple[int, int, int], Color]
+TColor = Union[Tuple[int, int, int], ColorValue]
 class TransitionFunction(Protocol):
-    def __call__(self, i, pixels: List[Color], init: bool = False) -> Color: ...
+    def __call__(self, i, pixels: Sequence[Color], init: bool = False) -> Color: ...
+
+
+class PixelView(Sequence):
+    """Read-only, list-like view of an (N, 3) uint8 RGB frame.
+
+    Colors are only built when an item is actually read, so handing the view to
+    a transition function costs nothing for pixels it never looks at.
+    """
+    __slots__ = ('_frame', )
+
+    def __init__(self, frame: np.ndarray):
+        self._frame = frame
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._frame)))]
+        r, g, b = self._frame[i].tolist()
+        return ColorValue((r << 16) | (g << 8) | b)
+
+
+class FrameTransitionFunction(Protocol):
+    def __call__(self, frame: np.ndarray, init: bool = False) -> np.ndarray: ...
+
+
+class SegmentedTransitionFunction(Protocol):
+    def __call__(self, frame: np.ndarray, init: bool = False, region: slice = slice(None)) -> np.ndarray: ...
+
+
+def pack_colors(pixels: Iterable[ColorValue]) -> np.ndarray:
+    return unpack_rgb(np.array([int(pixel) for pixel in pixels], dtype=np.uint32))
+
+
+def frame_transition(func: FrameTransitionFunction) -> FrameTransitionFunction:
+    """Mark func as a whole-frame transition: `(frame, init) -> frame` on (N, 3) uint8 arrays.
+
+    Strand calls a marked function once per frame instead of once per pixel.
+    """
+    func.is_frame_transition = True
+    return func
+
+
+def is_frame_transition(func) -> bool:
+    return getattr(func, 'is_frame_transition', False)
+
+
+def segmented(func: SegmentedTransitionFunction) -> SegmentedTransitionFunction:
+    """Mark a frame transition as able to render part of a frame.
+
+    Called with `region`, a slice of pixel indices, it returns the next frame's
+    pixels in that region only, while still reading from the whole of `frame`.
+    Strand.loop(processes=...) needs this to split frames between processes.
+    """
+    func.is_frame_transition = True
+    func.is_segmented = True
+    return func
+
+
+def is_segmented(func) -> bool:
+    return getattr(func, 'is_segmented', False)
+
+
+def per_pixel(func: TransitionFunction) -> SegmentedTransitionFunction:
+    """Adapt a per-pixel `(i, pixels, init) -> Color` function to the frame protocol."""
+    @segmented
+    def adapted(frame: np.ndarray, init: bool = False, region: slice = slice(None)) -> np.ndarray:
+        pixels = PixelView(frame)
+        return pack_colors([func(i, pixels, init=init) for i in range(*region.indices(len(frame)))])
+    adapted.__wrapped__ = func
+    return adapted
+
+
+def install_signal_handlers(event: Event):
+    """Set event on SIGTERM, SIGHUP and SIGINT, so that a running loop clears the strip and returns."""
+    def keyboard_interupt(signo, _frame):
+        print("Clearing strip. Exiting.")
+        event.set()
+
+    for sig in ('TERM', 'HUP', 'INT'):
+        signal.signal(getattr(signal, 'SIG' + sig), keyboard_interupt)
+
 
 class Strand:
     _func = None
+    _frame_func = None
+    _renderer = None
+    _segments = None
+    _changes = None
+    _recorder = None
+    MAX_WRITE_RUNS = 8
     def __init__(self, led_count: int, pin: int = 18, frequency: int = 800000, dma: int = 10, invert: bool = False,
-                 max_brightness: int = 255, channel: int = 0, delay_ms: float = 50):
+                 max_brightness: int = 255, channel: int = 0, delay_ms: float = 50, color_order: str = None,
+                 strip=None, cache: Union[FrameCache, None] = frame_cache, handle_signals: bool = True,
+                 output: Optional[OutputStage] = None, power: Optional[PowerLimiter] = None):
         """
         LED_COUNT = 16  # Number of LED pixels.
         LED_PIN = 18  # GPIO pin connected to the pixels (18 uses PWM!).
@@ -35,36 +136,147 @@ class Strand:
         LED_BRIGHTNESS = 255  # Set to 0 for darkest and 255 for brightest
         LED_INVERT = False  # True to invert the signal (when using NPN transistor level shift)
         LED_CHANNEL = 0  # set to '1' for GPIOs 13, 19, 41, 45 or 53
+        COLOR_ORDER = 'RBG'  # Which of our channels goes to the driver's red, green and blue slots
+                             # ('RGB' on the terminal mock)
+        strip: an already constructed PixelStrip-like backend to drive instead of creating one
+        cache: where periodic animations keep their rendered frames (see cache.py); None to always compute
+        handle_signals: stop loop() on SIGTERM, SIGHUP and SIGINT; turn off when something else, e.g. a
+                        Controller, owns the process's signals
+        output: gamma, brightness and dithering applied on the way to the strip (see OutputStage)
+        power: current budget enforced on what is pushed, after output (see PowerLimiter)
         """
         self._exitEvent = Event()
-        def keyboard_interupt(signo, _frame):
-            print("Clearing strip. Exiting.")
-            self._exitEvent.set()
-
-        for sig in ('TERM', 'HUP', 'INT'):
-            signal.signal(getattr(signal, 'SIG' + sig), keyboard_interupt);
+        if handle_signals:
+            install_signal_handlers(self._exitEvent)
 
-        self._strip = PixelStrip(led_count, pin, frequency, dma, invert, max_brightness, channel)
-        self._strip.begin()
-        self._pixels = [Color(0, 0, 0) for _ in range(led_count)]
+        if strip is None:
+            strip = PixelStrip(led_count, pin, frequency, dma, invert, max_brightness, channel)
+            strip.begin()
+        self._strip = strip
+        self._frame = np.zeros((led_count, 3), dtype=np.uint8)
+        # What the backend's LED buffer currently holds, and whether it has
+        # changed since the last show().
+        self._pushed = self._frame.copy()
+        self._dirty = True
+        self._resend = True
+        self._output = output
+        self._power = power
+        self.color_order = color_order if color_order is not None else 'RGB' if MOCK else 'RBG'
         self._delay = delay_ms / 1000.0
-        def identity(i, pixels, init=False):
-            return pixels[i]
+        self._scheduler = FrameScheduler(self._delay)
+        self._stats = FrameStats()
+        self._cache = cache
+        self._stats.gauges = self._gauges
+        @segmented
+        def identity(frame, init=False, region=slice(None)):
+            return frame[region]
 
         self.transition_function = identity
 
 
     def __len__(self):
-        return len(self._pixels)
+        return len(self._frame)
+
+    def __getitem__(self, n) -> ColorValue:
+        return self.pixels[n]
+
+    @property
+    def color_order(self) -> str:
+        return self._color_order
+
+    @color_order.setter
+    def color_order(self, order: str):
+        if sorted(order) != ['B', 'G', 'R']:
+            raise ValueError(f'Invalid color order: {order=}')
+        self._color_order = order
+        self._order = ['RGB'.index(c) for c in order]
+        self._resend = True
 
     @property
-    def transition_function(self) -> TransitionFunction:
+    def output(self) -> Optional[OutputStage]:
+        return self._output
+
+    @output.setter
+    def output(self, output: Optional[OutputStage]):
+        self._output = output
+        self._resend = True
+
+    @property
+    def power(self) -> Optional[PowerLimiter]:
+        return self._power
+
+    @power.setter
+    def power(self, power: Optional[PowerLimiter]):
+        self._power = power
+        self._resend = True
+
+    def _gauges(self) -> dict:
+        gauges = {f'scheduler_{k}': v for k, v in self._scheduler.stats().items()}
+        if self._power is not None:
+            gauges.update({f'power_{k}': v for k, v in self._power.stats().items()})
+        return gauges
+
+    @property
+    def delay_ms(self) -> float:
+        return self._delay * 1000.0
+
+    @delay_ms.setter
+    def delay_ms(self, delay_ms: float):
+        self._delay = self._scheduler.period = delay_ms / 1000.0
+
+    @property
+    def scheduler(self) -> FrameScheduler:
+        """The frame clock used by loop(); its stats() report achieved fps and missed deadlines."""
+        return self._scheduler
+
+    @property
+    def stats(self) -> FrameStats:
+        """Per-phase frame timings; see FrameStats."""
+        return self._stats
+
+    @property
+    def frame(self) -> np.ndarray:
+        """The canonical (N, 3) uint8 RGB frame buffer."""
+        return self._frame
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """The current frame converted to an (N, 3) uint8 HSV array."""
+        return rgb_to_hsv(self._frame)
+
+    @hsv.setter
+    def hsv(self, hsv: np.ndarray):
+        self._frame = hsv_to_rgb(hsv)
+
+    @property
+    def pixels(self) -> PixelView:
+        return PixelView(self._frame)
+
+    @property
+    def transition_function(self) -> Union[TransitionFunction, FrameTransitionFunction]:
         return self._func
 
     @transition_function.setter
-    def transition_function(self, func: TransitionFunction):
+    def transition_function(self, func: Union[TransitionFunction, FrameTransitionFunction]):
         self._func = func
+        self._frame_func = func if is_frame_transition(func) else per_pixel(func)
+        if hasattr(self._frame_func, 'compile'):
+            # A Program (see kernels.py): compile it for this strand's length.
+            self._frame_func = self._frame_func.compile(len(self))
+        if self._cache is not None and CachedAnimation.cacheable(self._frame_func, len(self)):
+            self._frame_func = CachedAnimation(self._frame_func, len(self), self._cache)
         self._step(init=True)
+        if self._renderer is not None:
+            self._renderer.reseed(self._frame_func, self._frame)
+        if self._segments is not None:
+            self._segments.reseed(self._segment_func(), self._frame)
+
+    def _segment_func(self) -> SegmentedTransitionFunction:
+        # Workers render frames themselves, so there is nothing for them to replay.
+        func = self._frame_func.__wrapped__ if isinstance(self._frame_func, CachedAnimation) else self._frame_func
+        if not is_segmented(func):
+            raise ValueError(f'Transition function cannot be split between processes: {func=}')
+        return func
 
     def _main(self):
         try:
@@ -74,18 +286,77 @@ class Strand:
             self.clear()
 
     def setPixelColor(self, n, color):
-        self._pixels[n] = color
-        self._strip.setPixelColorRGB(n, color.r, color.b, color.g)
+        rgb = self._frame[n] = color.rgb
+        if self._output is None and self._power is None:
+            self._pushed[n] = rgb
+            self._strip.setPixelColorRGB(n, *(rgb[k] for k in self._order))
+            self._dirty = True
 
-    def _lock(self, pixels: List[Color] = []):
-        if len(pixels) == len(self._pixels):
-            self._pixels = pixels
+    def _write(self, start: int, stop: int, frame: np.ndarray):
+        """Hand pixels [start, stop) of frame to the backend in one call.
+
+        Reordering the channels for the strip and packing them into the
+        driver's 24-bit format is a single vectorized step.
+        """
+        packed = pack_rgb(frame[start:stop, self._order])
+        if hasattr(self._strip, 'setPixelBuffer'):
+            self._strip.setPixelBuffer(packed, start)
+        else:
+            # rpi_ws281x has no bulk setter, but its slice assignment runs the
+            # per-LED loop inside the library.
+            self._strip[start:stop] = packed.tolist()
 
-        for i, pixel in enumerate(self._pixels):
-            self.setPixelColor(i, pixel)
-        self._strip.show()
+    def _lock(self, frame: Union[np.ndarray, List[Color], None] = None, end='\r'):
+        """Make frame the current frame and show it.
+
+        Only pixels that differ from what was last written reach the backend,
+        and show() is skipped altogether when nothing changed.
+        """
+        self._update(frame)
+        self._push(end=end)
+
+    def _update(self, frame: Union[np.ndarray, List[Color], None] = None):
+        """Make frame the current frame and write it to the backend's buffer, without showing it."""
+        if frame is not None and len(frame) == len(self._frame):
+            if not isinstance(frame, np.ndarray):
+                frame = pack_colors(frame)
+            self._frame = frame
+
+        start_time = time.perf_counter()
+        shown = self._frame if self._output is None else self._output(self._frame)
+        if self._power is not None:
+            shown = self._power(shown)
+        if self._resend:
+            changed = np.arange(len(shown))
+            self._resend = False
+        else:
+            changed = np.flatnonzero((shown != self._pushed).any(axis=1))
+        if len(changed) > 0:
+            # Write each run of consecutive changed pixels with one call, or
+            # the whole changed span at once if the changes are scattered.
+            breaks = np.flatnonzero(np.diff(changed) > 1) + 1
+            if len(breaks) < self.MAX_WRITE_RUNS:
+                starts, stops = changed[np.r_[0, breaks]], changed[np.r_[breaks - 1, -1]] + 1
+            else:
+                starts, stops = changed[:1], changed[-1:] + 1
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                self._write(start, stop, shown)
+                self._pushed[start:stop] = shown[start:stop]
+            self._dirty = True
+        self._stats.record('write', time.perf_counter() - start_time)
+
+    def _push(self, end='\r'):
+        if self._dirty is False:
+            return
+        self._dirty = False
+        start_time = time.perf_counter()
+        if MOCK is True:
+            self._strip.show(end=end)
+        else:
+            self._strip.show()
+        self._stats.record('show', time.perf_counter() - start_time)
 
-    def _convert_color(self, _color: TColor, color_space: ColorSpace = ColorSpace.RGB) -> Color:
+    def _convert_color(self, _color: TColor, color_space: ColorSpace = ColorSpace.RGB) -> ColorValue:
         try:
             iter(_color)
             if len(_color) == 3:
@@ -101,7 +372,7 @@ class Strand:
             # _color is not iterable
             pass
 
-        if isinstance(_color, Color):
+        if isinstance(_color, ColorValue):
             return _color
         else:
             raise ValueError(f'Invalid color: _convert_color({_color=}, {color_space=})')
@@ -122,33 +393,174 @@ class Strand:
 
     def fill(self, _color: TColor, color_space: ColorSpace = ColorSpace.RGB, quick=False):
         color = self._convert_color(_color, color_space)
-        for i, _ in enumerate(self._pixels):
-            self.setPixelColor(i, color)
-            if quick is False:
+        if quick is True:
+            self._frame[:] = color.rgb
+        else:
+            for i in range(len(self._frame)):
+                self.setPixelColor(i, color)
                 self._exitEvent.wait(self._delay)
                 self._lock()
         self._lock()
 
-    def _step(self, init=False):
-        self._lock(
-            [self.transition_function(i, self._pixels, init=init) for i in range(len(self._pixels))]
-        )
-
-    def loop(self, iterations=None):
-        while not self._exitEvent.is_set() and (iterations is None or iterations == 0):
-            if iterations is not None:
-                iterations -= 1
-            self.show()
-            self._exitEvent.wait(self._delay)
+    def _step(self, init=False, end='\r'):
+        self._lock(self._render(init=init), end=end)
+
+    def _render(self, init=False) -> np.ndarray:
+        """Compute the next frame, without showing it."""
+        start_time = time.perf_counter()
+        if self._renderer is not None and init is False:
+            # The function runs on the render thread; what the output sees is
+            # how long it had to wait for the frame.
+            frame = self._renderer.next_frame(np.empty_like(self._frame))
+        elif self._segments is not None and init is False:
+            frame = self._segments.next_frame(self._frame)
+        else:
+            frame = self._frame_func(self._frame, init=init)
+        self._stats.record('transition', time.perf_counter() - start_time)
+        return frame
+
+    def loop(self, iterations=None, skip_frames: bool = False, lookahead: int = 0, processes: int = 0,
+             refresh_hz: float = 0):
+        """Show a frame every delay_ms, measured from frame start to frame start.
+
+        With skip_frames, frames whose deadline has already passed are dropped
+        rather than rendered late; see FrameScheduler. With lookahead > 0,
+        frames are computed on a background thread up to that many frames
+        ahead of the one being shown; see FrameRenderer. With processes > 0,
+        each frame is split into that many ranges of pixels, rendered in
+        parallel by worker processes; see SegmentRenderer. With refresh_hz and
+        a dithering output stage, the current frame is pushed again at that
+        rate until the next step, each time dithered anew; see OutputStage.
+        """
+        if lookahead > 0 and processes > 0:
+            raise ValueError('lookahead and processes cannot be combined')
+        if processes > 0:
+            self._segments = SegmentRenderer(self._segment_func(), self._frame, processes)
+        if lookahead > 0:
+            self._renderer = FrameRenderer(self._frame_func, self._frame, depth=lookahead)
+            self._renderer.start()
+        self._scheduler.skip_frames = skip_frames
+        self._scheduler.start()
+        try:
+            while not self._exitEvent.is_set() and (iterations is None or iterations > 0):
+                if iterations is not None:
+                    iterations -= 1
+                self._show()
+                start_time = time.perf_counter()
+                if refresh_hz > 0 and self._output is not None and self._output.dither:
+                    self._refresh(1.0 / refresh_hz)
+                if not self._scheduler.wait(self._exitEvent):
+                    break
+                self._stats.record('sleep', time.perf_counter() - start_time)
+                self._stats.end_frame()
+        finally:
+            if self._renderer is not None:
+                self._renderer.stop()
+                self._renderer = None
+            if self._segments is not None:
+                # The frame is a view of the renderer's shared memory.
+                self._frame = self._frame.copy()
+                self._segments.stop()
+                self._segments = None
         self.clear()
 
+    def _refresh(self, interval: float):
+        """Push the current frame, freshly dithered, every interval until the next frame is due."""
+        while self._scheduler.remaining() > interval:
+            if self._exitEvent.wait(interval):
+                return
+            self._update()
+            self._push()
+
+    async def run(self, iterations=None, skip_frames: bool = False):
+        """loop() for asyncio: `await strand.run()`, or run it as a task next to other coroutines.
+
+        Frames are rendered on the event loop; the push to the backend, which
+        blocks for as long as the driver takes to clock the data out, runs on
+        a worker thread so the event loop stays responsive meanwhile. Change
+        parameters with `await strand.set(...)`. Cancelling the task clears
+        the strip before the cancellation propagates.
+        """
+        loop = asyncio.get_running_loop()
+        # One thread, so pushes, and the final clear, happen strictly in order.
+        executor = ThreadPoolExecutor(1, thread_name_prefix='Strand')
+        self._changes = []
+        self._scheduler.skip_frames = skip_frames
+        self._scheduler.start()
+        try:
+            while not self._exitEvent.is_set() and (iterations is None or iterations > 0):
+                if iterations is not None:
+                    iterations -= 1
+                changes, self._changes = self._changes, []
+                for params, future in changes:
+                    try:
+                        self._apply(params)
+                    except Exception as ex:
+                        future.set_exception(ex)
+                self._update(self._render())
+                await loop.run_in_executor(executor, self._push)
+                if self._recorder is not None:
+                    self._recorder.write(self._frame)
+                for _, future in changes:
+                    if not future.done():
+                        future.set_result(None)
+                start_time = time.perf_counter()
+                await self._scheduler.wait_async()
+                self._stats.record('sleep', time.perf_counter() - start_time)
+                self._stats.end_frame()
+        finally:
+            for _, future in self._changes:
+                future.cancel()
+            self._changes = None
+            executor.submit(self.clear).result()
+            executor.shutdown()
+
+    async def set(self, **params):
+        """Change properties, e.g. `await strand.set(transition_function=..., delay_ms=20)`.
+
+        While run() is running the change is applied between two frames, and
+        this returns once the first frame showing it has been pushed.
+        Otherwise it is applied right away.
+        """
+        if self._changes is None:
+            self._apply(params)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._changes.append((params, future))
+        await future
+
+    def _apply(self, params: dict):
+        for name, value in params.items():
+            if not isinstance(getattr(type(self), name, None), property):
+                raise AttributeError(f'Not a Strand property: {name=}')
+            setattr(self, name, value)
+
     def show(self, step=True, end='\r'):
+        self._show(step, end)
+        self._stats.end_frame()
+
+    def _show(self, step=True, end='\r'):
         if step is True:
-            self._step()
-        if MOCK is True:
-            self._strip.show(end=end)
+            self._step(end=end)
         else:
-            self._strip.show()
+            self._lock(end=end)
+        if self._recorder is not None:
+            self._recorder.write(self._frame)
+
+    def record(self, path: str) -> FrameRecorder:
+        """Save every frame shown from now on to path, until stop_recording()."""
+        self.stop_recording()
+        self._recorder = FrameRecorder(path, len(self), 1.0 / self._delay if self._delay else 0.0, self.color_order)
+        return self._recorder
+
+    def stop_recording(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def play(self, path: str, loop: bool = True, frames: int = None):
+        """Play back a recording made with record(); see FramePlayer."""
+        FramePlayer(self, path, loop=loop).play(frames)
 
     def clear(self):
         self.fill(Color.black, quick=True)
@@ -0,0 +1,8 @@
+import pytest
+from advanced_blinken import mock_pixel_strip
+
+
+@pytest.fixture(autouse=True)
+def headless(monkeypatch):
+    """Keep the mock strip from drawing into the test output."""
+    monkeypatch.setattr(mock_pixel_strip.PixelStrip, 'default_renderer', mock_pixel_strip.NullRenderer)
@@ -0,0 +1,33 @@
+import numpy as np
+from advanced_blinken.animations import Animations
+from advanced_blinken.color import Color
+from advanced_blinken.strand import Strand
+
+
+def run(func, count: int, **loop_args):
+    strand = Strand(300, delay_ms=0, cache=None)
+    strand.transition_function = func
+    shown = []
+    strand._strip.show = lambda *args, **kwargs: shown.append(strand.frame.copy())
+    strand.loop(iterations=count, **loop_args)
+    return shown[:-1]
+
+
+class TestSparkle:
+    def testSeededRunsRepeat(self):
+        first = run(Animations.rainbow_sparkle(300, probability=.05, seed=7), 30)
+        second = run(Animations.rainbow_sparkle(300, probability=.05, seed=7), 30)
+        split = run(Animations.rainbow_sparkle(300, probability=.05, seed=7), 30, processes=3)
+        assert all((a == b).all() and (a == c).all() for a, b, c in zip(first, second, split))
+        assert any(frame.any() for frame in first)
+
+    def testDecayMatchesPerPixelTransformation(self):
+        func = Animations.sparkle(300, probability=.05, decay_rate=.8, seed=3)
+        decay = Animations.Transformation.exponential_decay(.8)
+        frame = func(np.zeros((300, 3), dtype=np.uint8), init=True)
+        for _ in range(30):
+            previous, frame = frame, func(frame)
+            for i in np.flatnonzero(previous.any(axis=1)).tolist():
+                expected = decay(Color(_rgb=tuple(previous[i].tolist())), int(func.state.age[i]))
+                assert tuple(frame[i].tolist()) == expected.rgb
+            assert (func.state.active == frame.any(axis=1)).all()
@@ -0,0 +1,58 @@
+import numpy as np
+from advanced_blinken.animations import Animations
+from advanced_blinken.cache import FrameCache, periodic, pure
+from advanced_blinken.strand import Strand, frame_transition
+
+
+def run(strand: Strand, count: int):
+    shown = []
+    for _ in range(count):
+        strand.show()
+        shown.append(strand.frame.copy())
+    return shown
+
+
+class TestFrameCache:
+    def testReplayMatchesComputed(self):
+        cache = FrameCache()
+        cached, computed = Strand(30, delay_ms=0, cache=cache), Strand(30, delay_ms=0, cache=None)
+        cached.transition_function = computed.transition_function = Animations.rainbow_chase(step_length=4)
+        assert all((a == b).all() for a, b in zip(run(cached, 600), run(computed, 600)))
+        assert cached._frame_func.cached and cache.nbytes == 255 * 30 * 3
+
+    def testExternalChangesAreComputed(self):
+        strand = Strand(10, delay_ms=0, cache=FrameCache())
+        strand.transition_function = Animations.pixel_chase()
+        run(strand, 11)
+        strand.fill((1, 2, 3), quick=True)
+        strand.show()
+        assert (strand.frame == (1, 2, 3)).all()
+
+    def testWrongPeriodIsNotCached(self):
+        @periodic(3)
+        @frame_transition
+        def count(frame, init=False):
+            return np.zeros_like(frame) if init else frame + 1
+        strand = Strand(4, delay_ms=0, cache=FrameCache())
+        strand.transition_function = count
+        run(strand, 10)
+        assert not strand._frame_func.cached and (strand.frame == 10).all()
+
+    def testPurePeriodIsDetected(self):
+        @pure
+        @frame_transition
+        def count(frame, init=False):
+            return np.zeros_like(frame) if init else (frame + 1) % 7
+        strand = Strand(4, delay_ms=0, cache=FrameCache())
+        strand.transition_function = count
+        run(strand, 8)
+        assert strand._frame_func.cached and len(strand._cache.get((count, 4))) == 7
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        cache = FrameCache(max_bytes=3 * 10 * 3 * 2)
+        frames = np.zeros((3, 10, 3), dtype=np.uint8)
+        cache.put('a', frames.copy())
+        cache.put('b', frames.copy())
+        cache.get('a')
+        cache.put('c', frames.copy())
+        assert cache.get('b') is None and cache.get('a') is not None and cache.nbytes == frames.nbytes * 2
@@ -1,25 +1,78 @@
+import copy
+import pickle
+
 import pytest
-from advanced_blinken.color import
-
-class ColorTest:
-    test_cases = [
-        ((0, 0, 0), (0, 0, 0)),
-        ((255, 255, 255), (0, 0, 100)),
-        ((255, 0, 0), (0, 100, 100)),
-        ((0, 255, 0), (120, 100, 100)),
-        ((0, 0, 255), (240, 100, 100)),
-        ((255, 255, 0), (60, 100, 100)),
-        ((0, 255, 255), (180, 100, 100)),
-        ((255, 0, 255), (300, 100, 100)),
-        ((191, 191, 191), (0, 0, 75)),
-        ((128, 128, 128), (0, 0, 50)),
-        ((128, 0, 0), (0, 100, 50)),
-        ((128, 128, 0), (60, 100, 50)),
-        ((0, 128, 0), (120, 100, 50)),
-        ((128, 0, 128), (300, 100, 50)),
-        ((0, 128, 128), (180, 100, 50)),
-        ((0, 0, 128), (240, 100, 50)),
-    ]
-
-    def testHSVtoRGBConversion(self):
-        for rgb, hsv in self.test_cases:
+from advanced_blinken.color import Color, ColorValue
+
+
+class TestColorValue:
+    def testIsImmutable(self):
+        color = ColorValue.from_rgb(1, 2, 3)
+        with pytest.raises(AttributeError):
+            color.rgb = (4, 5, 6)
+        with pytest.raises(AttributeError):
+            color._packed = 0
+        with pytest.raises(AttributeError):
+            del color._packed
+        assert color.rgb == (1, 2, 3) and int(color) == 0x010203
+
+    def testEqualityAndHash(self):
+        a, b = ColorValue.from_rgb(255, 0, 0), ColorValue.from_hsv(0, 255, 255)
+        assert a == b and hash(a) == hash(b)
+        assert a != ColorValue.from_rgb(254, 0, 0)
+        assert len({a, b, ColorValue.from_rgb(0, 0, 1)}) == 2
+        assert a == Color(255, 0, 0)
+
+    def testHsvIsComputedOnceAndKept(self):
+        color = ColorValue.from_rgb(0, 255, 0)
+        assert color._hsv_cache is None
+        assert color.hsv == (85, 255, 255) and color._hsv_cache == (85, 255, 255)
+
+    def testCopyAndPickleKeepTheValue(self):
+        color = ColorValue.from_hsv(170, 255, 255)
+        assert copy.copy(color) is color and copy.deepcopy(color) is color
+        restored = pickle.loads(pickle.dumps(color))
+        assert restored == color and restored.hsv == (170, 255, 255)
+
+
+class TestColor:
+    @pytest.mark.parametrize('kwargs', [
+        dict(_red=255, _green=0, _blue=0),
+        dict(_r=255, _g=0, _b=0),
+        dict(_rgb=(255, 0, 0)),
+        dict(_hsv=(0, 255, 255)),
+        dict(_h=0, _s=255, _v=255),
+    ])
+    def testConstructors(self, kwargs):
+        assert Color(**kwargs).rgb == (255, 0, 0)
+
+    def testRequiresAColor(self):
+        with pytest.raises(ValueError):
+            Color()
+
+    def testSettersResetTheHsvCache(self):
+        color = Color(255, 0, 0)
+        assert color.hsv == (0, 255, 255)
+        color.blue = 255
+        assert color._hsv_cache is None and color.hsv == (213, 255, 255)
+        color.value = 128
+        # Setting HSV keeps the components as given, not as they convert back.
+        assert color.hsv == (213, 255, 128) and color.rgb == (128, 0, 126)
+        color.rgb = 0x00ff00
+        assert color.hsv == (85, 255, 255)
+
+    def testIsNotHashable(self):
+        with pytest.raises(TypeError):
+            hash(Color(1, 2, 3))
+
+    def testCopiesAreIndependent(self):
+        color = Color(10, 20, 30)
+        for duplicate in (copy.copy(color), copy.deepcopy(color), pickle.loads(pickle.dumps(color))):
+            assert type(duplicate) is Color and duplicate == color
+            duplicate.red = 0
+            assert color.rgb == (10, 20, 30)
+
+    def testPaletteNames(self):
+        assert Color.white.rgb == (255, 255, 255)
+        with pytest.raises(AttributeError):
+            Color.not_a_color
@@ -0,0 +1,24 @@
+from advanced_blinken.animations import Animations
+from advanced_blinken.color import Color
+from advanced_blinken.controller import Controller
+from advanced_blinken.strand import Strand
+
+
+class TestController:
+    def testStrandsAreRenderedThenPushedTogether(self):
+        left, right = Strand(10, delay_ms=0, handle_signals=False), Strand(20, delay_ms=0, handle_signals=False)
+        left.transition_function = Animations.pixel_chase(Color.white)
+        right.transition_function = Animations.rainbow_cycle
+        events = []
+        for name, strand in (('left', left), ('right', right)):
+            strand._strip.setPixelBuffer = lambda data, offset, name=name: events.append(('write', name))
+            strand._strip.show = lambda *args, name=name, **kwargs: events.append(('show', name))
+        controller = Controller(dict(left=left, right=right), delay_ms=0)
+        controller.loop(iterations=3)
+        shows = [i for i, (kind, _) in enumerate(events) if kind == 'show']
+        assert len(shows) == 8 and shows[:2] == [shows[0], shows[0] + 1]
+        assert events[shows[0] - 1][0] == 'write'
+        assert not left.frame.any() and not right.frame.any()
+        report = controller.report()
+        assert set(report) == {'all', 'left', 'right'} and left.stats.frames == 3
+        assert 'strand="right"' in right.stats.prometheus()
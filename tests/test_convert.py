@@ -0,0 +1,48 @@
+import colorsys
+import itertools
+
+import numpy as np
+import pytest
+from advanced_blinken.convert import hsv_to_rgb, hsv_to_rgb_pixel, rgb_to_hsv, rgb_to_hsv_pixel, rotate_hue
+
+
+class TestConvert:
+    test_cases = [
+        ((0, 0, 0), (0, 0, 0)),
+        ((255, 255, 255), (0, 0, 255)),
+        ((255, 0, 0), (0, 255, 255)),
+        ((0, 255, 0), (85, 255, 255)),
+        ((0, 0, 255), (170, 255, 255)),
+        ((255, 255, 0), (43, 255, 255)),
+        ((0, 255, 255), (128, 255, 255)),
+        ((255, 0, 255), (213, 255, 255)),
+        ((128, 128, 128), (0, 0, 128)),
+        ((128, 0, 0), (0, 255, 128)),
+    ]
+    grid = np.array(list(itertools.product(range(0, 256, 5), repeat=3)), dtype=np.uint8)
+
+    @pytest.mark.parametrize('rgb, hsv', test_cases)
+    def testRGBtoHSVConversion(self, rgb, hsv):
+        assert rgb_to_hsv(np.array([rgb], dtype=np.uint8)).tolist() == [list(hsv)]
+        assert rgb_to_hsv_pixel(*rgb) == hsv
+
+    def testPixelMatchesArray(self):
+        assert [rgb_to_hsv_pixel(*c) for c in self.grid.tolist()] == [tuple(c) for c in rgb_to_hsv(self.grid).tolist()]
+        assert [hsv_to_rgb_pixel(*c) for c in self.grid.tolist()] == [tuple(c) for c in hsv_to_rgb(self.grid).tolist()]
+
+    def testMatchesColorsys(self):
+        for (r, g, b), (h, s, v) in zip(self.grid.tolist(), rgb_to_hsv(self.grid).tolist()):
+            eh, es, ev = (c * 255 for c in colorsys.rgb_to_hsv(r / 255, g / 255, b / 255))
+            assert min(abs(eh - h), 255 - abs(eh - h)) <= .5 + 1e-9
+            assert abs(es - s) <= .5 + 1e-9 and abs(ev - v) <= .5 + 1e-9
+        for (h, s, v), rgb in zip(self.grid.tolist(), hsv_to_rgb(self.grid).tolist()):
+            expected = (c * 255 for c in colorsys.hsv_to_rgb(h / 255, s / 255, v / 255))
+            assert all(abs(e - c) <= .5 + 1e-9 for e, c in zip(expected, rgb))
+
+    def testRoundTripKeepsHue(self):
+        hsv = np.stack([np.arange(255), np.full(255, 255), np.full(255, 255)], axis=-1).astype(np.uint8)
+        assert (rgb_to_hsv(hsv_to_rgb(hsv)) == hsv).all()
+
+    def testRotateHue(self):
+        frame = hsv_to_rgb(np.array([[10, 255, 255], [254, 255, 255]], dtype=np.uint8))
+        assert rgb_to_hsv(rotate_hue(frame))[:, 0].tolist() == [11, 0]
@@ -0,0 +1,64 @@
+import numpy as np
+from advanced_blinken.animations import Animations
+from advanced_blinken.color import Color
+from advanced_blinken.convert import rotate_hue
+from advanced_blinken.kernels import Glide, HueAdd, Mask, PerPixel, Program, Scale, Shift
+
+
+def steps(func, led_count: int, count: int):
+    frame = func(np.zeros((led_count, 3), dtype=np.uint8), init=True)
+    frames = [frame]
+    for _ in range(count):
+        frame = func(frame)
+        frames.append(frame)
+    return frames
+
+
+class TestKernels:
+    def testOpsAreFused(self):
+        kernel = Program(Animations.Initialization.rainbow, [Shift(2), Shift(3), Scale(.5), Mask([1, 0] * 5),
+                                                             HueAdd(1), HueAdd(255)]).compile(10)
+        assert [type(op) for op in kernel.ops] == [Shift, Mask]
+        assert kernel.ops[0].steps == 5 and kernel.ops[1].weights.tolist() == [.5, 0] * 5
+
+    def testRainbowChaseMatchesReference(self):
+        frames = steps(Animations.rainbow_chase(step_length=3), 20, 40)
+        for previous, frame in zip(frames, frames[1:]):
+            assert (frame == rotate_hue(np.roll(previous, -3, axis=0))).all()
+
+    def testUserTransformationsTakeTheSlowPath(self):
+        dim = lambda pixel: Color(_rgb=tuple(c // 2 for c in pixel.rgb))
+        chase = Animations.pixel_chase(Color.white, transformation=dim)
+        assert isinstance(chase.ops[-1], PerPixel) and not getattr(chase.compile(8), 'pure', False)
+        assert steps(chase, 8, 2)[-1][6].tolist() == [63, 63, 63]
+
+    def testRegionsMatchTheWholeFrame(self):
+        program = Program(Animations.Initialization.first_pixel_to_color(Color.white),
+                          [Shift(1), HueAdd(1), Mask(np.linspace(0, 1, 10)), Shift(1), PerPixel(lambda pixel: pixel)])
+        kernel = program.compile(10)
+        assert kernel.is_segmented
+        frame = kernel(np.zeros((10, 3), dtype=np.uint8), init=True)
+        for _ in range(3):
+            whole = kernel(frame)
+            split = np.concatenate([kernel(frame, region=slice(start, start + 4)) for start in (0, 4, 8)])
+            assert (split == whole).all()
+            frame = whole
+        assert np.flatnonzero(frame.any(axis=1)).tolist() == [4]
+
+    def testSmoothChaseStreaks(self):
+        frames = steps(Animations.pixel_chase(Color.white, step_length=4, smooth=True), 20, 2)
+        assert np.flatnonzero(frames[1].any(axis=1)).tolist() == [16, 17, 18, 19]
+        assert np.flatnonzero(frames[2].any(axis=1)).tolist() == [12, 13, 14, 15]
+        assert (frames[2][12:16] == 63).all()
+
+    def testGlideInterpolatesFractionalPositions(self):
+        clock = iter(np.arange(0, 10, .25)).__next__
+        program = Program(Animations.Initialization.first_pixel_to_color(Color.white),
+                          [Glide(per_second=2, clock=clock)], smooth=True)
+        frames = steps(program, 10, 4)
+        assert (frames[1] == frames[0]).all()
+        assert frames[2][[9, 0]].tolist() == [[128] * 3, [128] * 3] and frames[2][1:9].sum() == 0
+        assert np.flatnonzero(frames[3].any(axis=1)).tolist() == [9] and (frames[3][9] == 255).all()
+        assert frames[4][[8, 9]].tolist() == [[128] * 3, [128] * 3]
+        rounded = steps(Animations.pixel_chase(Color.white, step_length=.5), 10, 4)
+        assert [int(np.flatnonzero(frame.any(axis=1))[0]) for frame in rounded] == [0, 9, 9, 8, 8]
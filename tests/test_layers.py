@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from advanced_blinken.animations import Animations
+from advanced_blinken.layers import Layer, LayerStack
+from advanced_blinken.strand import Strand, frame_transition
+
+
+def solid(*rgb):
+    @frame_transition
+    def func(frame, init=False):
+        return np.full_like(frame, rgb)
+    return func
+
+
+class TestLayerStack:
+    @pytest.mark.parametrize('blend, opacity, expected', [
+        ('add', 1.0, (255, 150, 100)),
+        ('multiply', 1.0, (100, 20, 0)),
+        ('screen', 1.0, (255, 130, 100)),
+        ('alpha', .5, (178, 75, 50)),
+        ('max', 1.0, (255, 100, 100)),
+    ])
+    def testBlendModes(self, blend, opacity, expected):
+        stack = LayerStack(Layer(solid(100, 100, 100)), Layer(solid(255, 50, 0), blend=blend, opacity=opacity))
+        assert tuple(stack(np.zeros((4, 3), dtype=np.uint8))[0]) == expected
+
+    def testLayersAnimateIndependently(self):
+        rainbow = Strand(20, delay_ms=0)
+        rainbow.transition_function = Animations.rainbow_cycle
+        strand = Strand(20, delay_ms=0)
+        stack = LayerStack(Layer(Animations.rainbow_cycle))
+        chase = stack.add(Animations.pixel_chase(), blend='max')
+        strand.transition_function = stack
+        for _ in range(3):
+            rainbow.show()
+            strand.show()
+        assert (strand.frame[:17] == rainbow.frame[:17]).all() and (strand.frame[17] == 255).all()
+        chase.visible = False
+        rainbow.show()
+        strand.show()
+        assert (strand.frame == rainbow.frame).all()
@@ -0,0 +1,52 @@
+import io
+import time
+
+import numpy as np
+from advanced_blinken.mock_pixel_strip import AnsiRenderer, PixelStrip
+
+
+class TestAnsiRenderer:
+    def testRedrawsOnlyChangedCells(self):
+        out = io.StringIO()
+        renderer = AnsiRenderer(out, max_fps=0, width=4)
+        leds = np.array([0xFF0000, 0xFF0000, 0, 0x00FF00, 1, 2], dtype=np.uint32)
+        renderer.render(leds)
+        assert out.getvalue().count(AnsiRenderer.CELL) == 6
+        out.seek(0), out.truncate()
+        leds[5] = 0x0000FF
+        renderer.render(leds)
+        assert out.getvalue() == '\x1b[1B\x1b[2G\x1b[38;2;0;0;255;48;2;0;0;255m▄\x1b[0m\x1b[1A\r'
+        out.seek(0), out.truncate()
+        renderer.render(leds)
+        assert out.getvalue() == ''
+
+    def testRefreshRateIsCapped(self):
+        now = [0.0]
+        renderer = AnsiRenderer(io.StringIO(), max_fps=10, width=4, clock=lambda: now[0])
+        leds = np.zeros(4, dtype=np.uint32)
+        assert renderer.render(leds)
+        now[0] = .05
+        assert not renderer.render(leds)
+        now[0] = .1
+        assert renderer.render(leds)
+
+    def testHeldBackFrameIsDrawnLater(self):
+        out = io.StringIO()
+        renderer = AnsiRenderer(out, max_fps=20, width=4)
+        leds = np.full(4, 0xFF0000, dtype=np.uint32)
+        assert renderer.render(leds)
+        leds[:] = 0
+        assert not renderer.render(leds)
+        time.sleep(.2)
+        # Nothing newer came, so the cleared strip still reaches the terminal.
+        assert out.getvalue().endswith('\x1b[38;2;0;0;0;48;2;0;0;0m▄▄▄▄\x1b[0m\r')
+        assert (renderer._drawn == 0).all()
+
+
+class TestPixelStrip:
+    def testBulkWrite(self):
+        strip = PixelStrip(6, 18)
+        strip.setPixelBuffer(np.array([1, 2, 3], dtype=np.uint32), 2)
+        strip.setPixelBuffer(np.array([7], dtype=np.uint32).tobytes(), 5)
+        assert strip.getPixels() == [0, 0, 1, 2, 3, 7]
+        assert strip.renderer.frames == 0
@@ -0,0 +1,67 @@
+import socket
+import struct
+import time
+
+from advanced_blinken.network import NetworkReceiver
+from advanced_blinken.strand import Strand
+
+
+def sacn(universe: int, sequence: int, data: bytes) -> bytes:
+    framing = struct.pack('>HI64sBHBBH', 0x7000, 2, b'test', 100, 0, sequence, 0, universe)
+    dmp = struct.pack('>HBBHHHB', 0x7000, 2, 0xa1, 0, 1, len(data) + 1, 0) + data
+    return struct.pack('>HH12sHI16s', 0x10, 0, b'ASC-E1.17\0\0\0', 0x7000, 4, bytes(16)) + framing + dmp
+
+
+def artnet(universe: int, sequence: int, data: bytes) -> bytes:
+    return struct.pack('<8sHBBBBH', b'Art-Net\0', 0x5000, 0, 14, sequence, 0, universe) + struct.pack('>H', len(data)) + data
+
+
+def wait_for(receiver: NetworkReceiver, updates: int):
+    deadline = time.monotonic() + 2
+    while receiver.updates < updates and time.monotonic() < deadline:
+        time.sleep(.001)
+
+
+class TestNetworkReceiver:
+    def testProtocolsOverLoopback(self):
+        ports = dict(sacn_port=0, artnet_port=0, opc_port=0, multicast=False, host='127.0.0.1')
+        with NetworkReceiver(200, **ports) as receiver:
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp.sendto(sacn(2, 1, bytes([1, 2, 3] * 30)), receiver.addresses['sacn'])
+            udp.sendto(artnet(0, 1, bytes([4, 5, 6] * 2)), receiver.addresses['artnet'])
+            wait_for(receiver, 2)
+            with socket.create_connection(receiver.addresses['opc']) as opc:
+                payload = bytes([7, 8, 9] * 3)
+                message = struct.pack('>BBH', 1, 0, len(payload)) + payload
+                opc.sendall(message[:3])
+                opc.sendall(message[3:])
+                wait_for(receiver, 3)
+
+            strand = Strand(200, delay_ms=0, handle_signals=False)
+            strand.transition_function = receiver
+            strand.show()
+            assert (strand.frame[:3] == (7, 8, 9)).all() and (strand.frame[3:6] == (0, 0, 0)).all()
+            assert (strand.frame[170:200] == (1, 2, 3)).all()
+
+    def testStalePacketsAreDropped(self):
+        with NetworkReceiver(10, sacn_port=0, artnet_port=None, opc_port=None, multicast=False,
+                             host='127.0.0.1') as receiver:
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for sequence, value in ((10, 1), (9, 2), (11, 3), (255, 4)):
+                udp.sendto(sacn(1, sequence, bytes([value] * 30)), receiver.addresses['sacn'])
+            deadline = time.monotonic() + 2
+            while receiver.packets < 4 and time.monotonic() < deadline:
+                time.sleep(.001)
+            assert receiver.dropped == 2 and (receiver.frame == 3).all()
+
+    def testFullUniversesStayInTheirPixels(self):
+        with NetworkReceiver(400, sacn_port=0, artnet_port=0, opc_port=None, multicast=False,
+                             host='127.0.0.1') as receiver:
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp.sendto(sacn(2, 1, bytes([9] * 512)), receiver.addresses['sacn'])
+            wait_for(receiver, 1)
+            udp.sendto(sacn(1, 1, bytes([5] * 512)), receiver.addresses['sacn'])
+            udp.sendto(artnet(2, 1, bytes([7] * 512)), receiver.addresses['artnet'])
+            wait_for(receiver, 3)
+            frame = receiver.frame
+            assert (frame[:170] == 5).all() and (frame[170:340] == 9).all() and (frame[340:] == 7).all()
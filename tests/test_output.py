@@ -0,0 +1,39 @@
+import numpy as np
+from advanced_blinken.convert import unpack_rgb
+from advanced_blinken.output import OutputStage, PowerLimiter
+from advanced_blinken.strand import Strand
+
+
+class TestOutputStage:
+    def testLutEndpoints(self):
+        stage = OutputStage(gamma=2.2, brightness=.5)
+        assert stage.lut[0] == 0 and stage.lut[255] == round(.5 * (255 << 8))
+        assert (np.diff(stage.lut.astype(int)) >= 0).all()
+
+    def testDitherAveragesToLinearValue(self):
+        stage = OutputStage(gamma=2.2)
+        frame = np.array([[10, 40, 200]], dtype=np.uint8)
+        pushed = np.array([stage(frame) for _ in range(256)], dtype=np.float64)
+        assert np.allclose(pushed.mean(axis=0) * 256, stage.linear(frame), atol=1)
+        assert OutputStage(dither=False)(frame).tolist() == [[0, 4, 149]]
+
+    def testRefreshRepushesDitheredFrames(self):
+        strand = Strand(4, delay_ms=20, output=OutputStage())
+        strand.fill((24, 24, 24), quick=True)
+        pushes = []
+        strand._strip.show = lambda *args, **kwargs: pushes.append(strand._strip.getPixels())
+        strand.loop(iterations=2, refresh_hz=500)
+        assert len(pushes) > 4 and len(set(map(tuple, pushes[:-1]))) > 1
+
+
+class TestPowerLimiter:
+    def testFramesAreScaledUnderBudget(self):
+        power = PowerLimiter(budget_ma=5000)
+        strand = Strand(450, delay_ms=0, power=power)
+        strand.fill((255, 255, 255), quick=True)
+        pushed = unpack_rgb(np.array(strand._strip.getPixels(), dtype=np.uint32))
+        assert power.estimated_ma == 450 * 61 and power.drawn_ma <= 5000
+        assert power.estimate(pushed) == power.drawn_ma and (pushed == pushed[0, 0]).all()
+        assert strand.stats.gauges()['power_estimated_ma'] == 450 * 61
+        strand.fill((10, 0, 0), quick=True)
+        assert power.scale == 1.0 and strand._strip.getPixelColorRGB(0) == (10, 0, 0)
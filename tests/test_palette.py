@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from advanced_blinken.color import Color, ColorValue
+from advanced_blinken.palette import palette
+
+
+class TestPalette:
+    def testConstantsAreInterned(self):
+        assert Color.black is Color.black
+        assert Color.families['grays']['black'] is palette['black']
+        assert isinstance(Color.cyan, ColorValue)
+        assert Color.cyan.rgb == (0, 255, 255)
+
+    def testNearestMatchesBruteForce(self):
+        frame = np.random.default_rng(0).integers(0, 256, (5000, 3)).astype(np.uint8)
+        distance = ((frame[:, None, :].astype(int) - palette.rgb[None, :, :].astype(int)) ** 2).sum(axis=-1)
+        assert (palette.nearest_index(frame) == distance.argmin(axis=-1)).all()
+
+    def testNearestName(self):
+        assert palette.nearest_name(Color(250, 1, 3)) == 'red'
+        assert (palette.quantize(palette.rgb) == palette.rgb).all()
+
+    @pytest.mark.parametrize('module', ['advanced_blinken.palette', 'advanced_blinken.color'])
+    def testImportsOnItsOwn(self, module):
+        # A fresh interpreter, so nothing else has imported the other module first.
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True, env=env)
@@ -0,0 +1,78 @@
+from threading import Event
+
+import numpy as np
+from advanced_blinken.animations import Animations
+from advanced_blinken.playlist import Playlist
+from advanced_blinken.strand import Strand, frame_transition
+
+
+def solid(*rgb, ready=None):
+    @frame_transition
+    def func(frame, init=False):
+        if init and ready is not None:
+            ready.wait(5)
+        return np.full_like(frame, rgb)
+    return func
+
+
+class TestPlaylist:
+    def testCrossfadesIntoThePrewarmedEntry(self):
+        now = [0.0]
+        playlist = Playlist(fade=1, clock=lambda: now[0])
+        playlist.add(solid(200, 0, 0), duration=2)
+        playlist.add(solid(0, 0, 100), duration=2)
+        strand = Strand(4, delay_ms=0)
+        strand.transition_function = playlist
+        playlist._warming.result()
+        shown = []
+        for t in (.5, 1, 1.5, 2, 2.5, 3):
+            now[0] = t
+            strand.show()
+            shown.append(tuple(strand.frame[0]))
+        assert shown == [(200, 0, 0)] * 4 + [(100, 0, 50), (0, 0, 100)]
+        assert playlist.current is playlist[1]
+        # Looping back to the first entry, which was initialized again in the meantime.
+        playlist._warming.result()
+        for t in (4, 4.5):
+            now[0] = t
+            strand.show()
+        assert tuple(strand.frame[0]) == (100, 0, 50)
+        playlist.close()
+
+    def testWaitsForSlowInitWithoutBlocking(self):
+        now = [0.0]
+        ready = Event()
+        playlist = Playlist(fade=0, loop=False, clock=lambda: now[0])
+        playlist.add(Animations.rainbow_cycle, duration=1)
+        playlist.add(solid(0, 255, 0, ready=ready), duration=1)
+        frame = playlist(np.zeros((10, 3), dtype=np.uint8), init=True)
+        now[0] = 5
+        for _ in range(3):
+            frame = playlist(frame)
+        assert playlist.late == 3 and playlist.current is playlist[0]
+        ready.set()
+        playlist._warming.result()
+        assert (playlist(frame) == (0, 255, 0)).all()
+        assert (playlist(frame) == (0, 255, 0)).all()
+        playlist.close()
+
+    def testEntriesAddedAfterAssignment(self):
+        now = [0.0]
+        playlist = Playlist(fade=0, clock=lambda: now[0])
+        playlist.add(solid(255, 0, 0), duration=1)
+        strand = Strand(4, delay_ms=0)
+        strand.transition_function = playlist
+        playlist.add(solid(0, 255, 0), duration=1)
+        strand.show()
+        playlist._warming.result()
+        now[0] = 1
+        strand.show()
+        assert tuple(strand.frame[0]) == (0, 255, 0) and playlist.current is playlist[1]
+        # While the first entry is warming up to come next, a third one is added after the second.
+        playlist.add(solid(0, 0, 255), duration=1)
+        strand.show()
+        playlist._warming.result()
+        now[0] = 2
+        strand.show()
+        assert tuple(strand.frame[0]) == (0, 0, 255)
+        playlist.close()
@@ -0,0 +1,35 @@
+from advanced_blinken.animations import Animations
+from advanced_blinken.recording import FramePlayer, Recording
+from advanced_blinken.strand import Strand
+
+
+class TestRecording:
+    def testRecordAndReplay(self, tmp_path):
+        path = str(tmp_path / 'show.blnk')
+        strand = Strand(25, delay_ms=1)
+        strand.transition_function = Animations.rainbow_chase()
+        strand.record(path)
+        shown = []
+        for _ in range(10):
+            strand.show()
+            shown.append(strand.frame.copy())
+        strand.stop_recording()
+
+        recording = Recording(path)
+        assert (len(recording), recording.led_count, recording.fps) == (10, 25, 1000.0)
+        assert all((recording[i] == frame).all() for i, frame in enumerate(shown))
+
+        player = FramePlayer(strand, recording)
+        player.seek(8)
+        for expected in (8, 9, 0):
+            player.step()
+            assert (strand.frame == shown[expected]).all()
+
+    def testEmptyRecording(self, tmp_path):
+        path = str(tmp_path / 'empty.blnk')
+        strand = Strand(5, delay_ms=1)
+        strand.record(path)
+        strand.stop_recording()
+        player = FramePlayer(strand, path)
+        player.seek(3)
+        assert player.position == 0 and not player.step()
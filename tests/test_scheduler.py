@@ -0,0 +1,51 @@
+from advanced_blinken.scheduler import FrameScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, timeout):
+        self.now += timeout
+        return False
+
+
+class TestFrameScheduler:
+    def testDeadlinesAbsorbRenderTime(self):
+        clock = FakeClock()
+        scheduler = FrameScheduler(.05, clock=clock)
+        scheduler.start()
+        for _ in range(10):
+            clock.now += .03
+            scheduler.wait(clock)
+        assert abs(clock.now - .5) < 1e-9
+        assert scheduler.missed == 0
+        assert abs(scheduler.fps - 20) < 1e-6
+
+    def testOverrunIsCaughtUp(self):
+        clock = FakeClock()
+        scheduler = FrameScheduler(.05, clock=clock)
+        scheduler.start()
+        clock.now += .12
+        scheduler.wait(clock)
+        assert scheduler.missed == 1 and abs(scheduler.overrun - .07) < 1e-9
+        clock.now += .01
+        scheduler.wait(clock)
+        assert scheduler.missed == 2 and abs(clock.now - .13) < 1e-9
+        clock.now += .01
+        scheduler.wait(clock)
+        assert abs(clock.now - .15) < 1e-9
+
+    def testSkipFrames(self):
+        clock = FakeClock()
+        scheduler = FrameScheduler(.05, skip_frames=True, clock=clock)
+        scheduler.start()
+        clock.now += .12
+        scheduler.wait(clock)
+        assert scheduler.skipped == 1
+        clock.now += .01
+        scheduler.wait(clock)
+        assert scheduler.missed == 1 and abs(clock.now - .15) < 1e-9
@@ -0,0 +1,25 @@
+from advanced_blinken.stats import FrameStats
+from advanced_blinken.strand import Strand
+
+
+class TestFrameStats:
+    def testStrandRecordsPhases(self):
+        strand = Strand(20, delay_ms=1)
+        frames = []
+        strand.stats.add_callback(frames.append)
+        strand.loop(iterations=5)
+        assert len(frames) >= 5
+        assert all(frames[0][phase] > 0 for phase in ('transition', 'write', 'sleep'))
+        assert strand.stats.summary('frame')['count'] >= 4
+
+    def testPrometheusExport(self, tmp_path):
+        stats = FrameStats(labels=dict(strand='room'))
+        stats.record('show', .003)
+        stats.record('show', .2)
+        stats.end_frame()
+        path = tmp_path / 'blinken.prom'
+        stats.write_prometheus(str(path))
+        text = path.read_text()
+        assert 'blinken_phase_seconds_bucket{strand="room",phase="show",le="0.005"} 1' in text
+        assert 'blinken_phase_seconds_count{strand="room",phase="show"} 2' in text
+        assert 'blinken_frames_total{strand="room"} 1' in text
@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+import pytest
+from advanced_blinken.animations import Animations
+from advanced_blinken.color import Color
+from advanced_blinken.strand import Strand, is_frame_transition
+
+
+def frames(strand: Strand, count: int, **loop_args):
+    shown = []
+    strand._strip.show = lambda *args, **kwargs: shown.append(strand.frame.copy())
+    strand.loop(iterations=count, **loop_args)
+    return shown
+
+
+class TestStrand:
+    def testPerPixelFunctionsAreAdapted(self):
+        strand = Strand(10, delay_ms=0)
+        strand.transition_function = lambda i, pixels, init=False: Color.cyan if init else pixels[(i + 1) % len(pixels)]
+        assert not is_frame_transition(strand.transition_function)
+        assert (strand.frame == (0, 255, 255)).all()
+        assert strand[3] == Color.cyan
+
+    def testLookaheadMatchesInline(self):
+        strand = Strand(30, delay_ms=0)
+        strand.transition_function = Animations.rainbow_chase()
+        inline = frames(strand, 12)
+        strand.transition_function = Animations.rainbow_chase()
+        queued = frames(strand, 12, lookahead=3)
+        assert all((a == b).all() for a, b in zip(inline, queued))
+
+    def testOnlyChangedPixelsArePushed(self):
+        strand = Strand(40, delay_ms=0)
+        strand.transition_function = Animations.pixel_chase(Color.white)
+        writes, shows = [], []
+        strand._strip.setPixelBuffer = lambda data, offset: writes.extend(range(offset, offset + len(data)))
+        strand._strip.show = lambda *args, **kwargs: shows.append(True)
+        strand.show()
+        assert sorted(writes) == [0, 39]
+        strand.transition_function = Animations.chase(Animations.Initialization.fill(Color.white))
+        writes.clear(), shows.clear()
+        for _ in range(3):
+            strand.show()
+        assert writes == [] and shows == []
+
+    def testColorOrder(self):
+        strand = Strand(4, delay_ms=0, color_order='GRB')
+        strand.fill((1, 2, 3), quick=True)
+        assert strand._strip.getPixelColorRGB(2) == (2, 1, 3)
+        strand.color_order = 'RGB'
+        strand.show(step=False)
+        assert strand._strip.getPixels() == [0x010203] * 4
+
+    def testProcessesMatchInline(self):
+        strand = Strand(30, delay_ms=0, cache=None)
+        strand.transition_function = Animations.rainbow_chase(step_length=4)
+        inline = frames(strand, 12)
+        strand.transition_function = Animations.rainbow_chase(step_length=4)
+        split = frames(strand, 12, processes=3)
+        assert all((a == b).all() for a, b in zip(inline, split))
+
+    def testProcessesSeeNeighbours(self):
+        strand = Strand(10, delay_ms=0)
+        strand.transition_function = lambda i, pixels, init=False: (
+            (Color.cyan if i == 0 else Color.black) if init else pixels[(i + 1) % len(pixels)])
+        shown = frames(strand, 4, processes=2)
+        assert [int(np.flatnonzero(frame.any(axis=1))[0]) for frame in shown[:4]] == [9, 8, 7, 6]
+
+    def testAsyncRun(self):
+        strand = Strand(10, delay_ms=1)
+        shown = []
+        strand._strip.show = lambda *args, **kwargs: shown.append(strand.frame.copy())
+
+        async def main():
+            task = asyncio.create_task(strand.run())
+            await asyncio.sleep(.01)
+            await strand.set(transition_function=Animations.pixel_chase(Color.white), delay_ms=2)
+            assert strand.scheduler.period == .002 and strand.frame.any()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        asyncio.run(main())
+        assert not shown[-1].any() and not strand.frame.any()